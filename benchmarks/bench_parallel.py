@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Times read_objfile(workers=N) on one large file for increasing worker counts.
+
+Usage: python benchmarks/bench_parallel.py [n_verts]
+"""
+from __future__ import print_function
+import multiprocessing
+import sys
+import tempfile
+import time
+from os import path
+
+sys.path.insert(0, path.join(path.dirname(__file__), '..'))
+from wavefront_reader import read_objfile
+from generate import write_mesh
+
+
+def main(n_verts=1000000):
+    fname = path.join(tempfile.mkdtemp(), 'bench.obj')
+    write_mesh(fname, n_verts, n_materials=0)
+    size_mb = path.getsize(fname) / 1e6
+    print('{} verts, {:.1f} MB, {} cpus'.format(n_verts, size_mb, multiprocessing.cpu_count()))
+
+    workers, baseline = 1, None
+    while workers <= max(multiprocessing.cpu_count(), 2):
+        start = time.time()
+        read_objfile(fname, workers=workers)
+        elapsed = time.time() - start
+        baseline = baseline or elapsed
+        print('  {:>3} workers: {:7.3f} s ({:6.1f} MB/s, {:4.1f}x)'.format(workers, elapsed, size_mb / elapsed,
+                                                                           baseline / elapsed))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Compares the bulk .obj parser in read_objfile() against the original line-by-line parser.
+
+Usage: python benchmarks/bench_read.py [n_verts]
+"""
+from __future__ import print_function
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from os import path
+import numpy as np
+from six import iteritems
+
+sys.path.insert(0, path.join(path.dirname(__file__), '..'))
+from wavefront_reader import read_objfile, parse_mixed_delim_str
+from generate import write_mesh
+
+
+def read_objfile_linewise(fname):
+    """The original pure-Python read_objfile, kept here as the benchmark baseline."""
+    verts = defaultdict(list)
+    obj_props = []
+    with open(fname) as f:
+        lines = f.read().splitlines()
+
+    for line in lines:
+        if line:
+            split_line = line.strip().split(' ', 1)
+            if len(split_line) < 2:
+                continue
+
+            prefix, value = split_line[0], split_line[1]
+            if prefix == 'o':
+                obj_props.append({})
+                obj = obj_props[-1]
+                obj['f'] = []
+                obj[prefix] = value
+            elif prefix == 'v' and len(obj_props) < 1:
+                obj_props.append({})
+                obj = obj_props[-1]
+                obj['f'] = []
+                obj['o'] = fname
+            if obj_props:
+                if prefix[0] == 'v':
+                    verts[prefix].append([float(val) for val in value.split(' ')])
+                elif prefix == 'f':
+                    obj[prefix].append(parse_mixed_delim_str(value))
+                else:
+                    obj[prefix] = value
+
+    verts = {key: np.array(value) for key, value in iteritems(verts)}
+    for obj in obj_props:
+        obj['f'] = tuple(np.array(verts) if verts[0] else tuple() for verts in zip(*obj['f']))
+        for idx, vertname in enumerate(['v', 'vt', 'vn']):
+            if vertname in verts:
+                obj[vertname] = verts[vertname][obj['f'][idx].flatten() - 1, :]
+            else:
+                obj[vertname] = tuple()
+        del obj['f']
+
+    return {obj['o']: obj for obj in obj_props}
+
+
+def best_of(func, fname, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        func(fname)
+        times.append(time.time() - start)
+    return min(times)
+
+
+def compare(title, fname):
+    size_mb = path.getsize(fname) / 1e6
+    linewise = best_of(read_objfile_linewise, fname, repeat=1)
+    bulk = best_of(read_objfile, fname)
+    print('{}, {:.1f} MB'.format(title, size_mb))
+    print('  line-by-line: {:7.3f} s ({:6.1f} MB/s)'.format(linewise, size_mb / linewise))
+    print('  bulk:         {:7.3f} s ({:6.1f} MB/s)'.format(bulk, size_mb / bulk))
+    print('  speedup:      {:7.1f}x'.format(linewise / bulk))
+
+
+def main(n_verts=1000000):
+    fname = path.join(tempfile.mkdtemp(), 'bench.obj')
+    write_mesh(fname, n_verts, n_materials=0)
+    compare('{} verts in one object'.format(n_verts), fname)
+
+    # Many objects and materials make many short runs, where the per-run overhead shows.
+    n_objects = max(n_verts // 500, 1)
+    write_mesh(fname, n_verts, n_objects=n_objects, n_materials=16)
+    compare('{} verts in {} objects with 16 materials'.format(n_verts, n_objects), fname)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
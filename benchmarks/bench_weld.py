@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Times vertex welding (writing.face_index) at 10k, 100k and 1M vertices.
+
+Usage: python benchmarks/bench_weld.py
+"""
+from __future__ import print_function
+import sys
+import time
+from os import path
+import numpy as np
+
+sys.path.insert(0, path.join(path.dirname(__file__), '..'))
+from wavefront_reader.writing import face_index
+
+
+def face_index_quadratic(vertices):
+    """The original face_index, which compares every vertex against all previously kept vertices."""
+    new_verts = []
+    face_indices = []
+    for wall in vertices:
+        face_wall = []
+        for vert in wall:
+            if new_verts:
+                if not np.isclose(vert, new_verts).all(axis=1).any():
+                    new_verts.append(vert)
+            else:
+                new_verts.append(vert)
+            face_wall.append(np.where(np.isclose(vert, new_verts).all(axis=1))[0][0])
+        face_indices.append(face_wall)
+    return np.array(new_verts), np.array(face_indices)
+
+
+def quad_grid(n_verts, seed=0):
+    """Returns an Mx4x3 array of quads from a jittered grid with about n_verts corners, so each point is shared."""
+    side = int(np.sqrt(n_verts / 4.)) + 1
+    xx, yy = np.meshgrid(np.arange(side + 1, dtype=float), np.arange(side + 1, dtype=float))
+    grid = np.dstack([xx, yy, np.zeros_like(xx)])
+    grid += np.random.RandomState(seed).randn(*grid.shape) * 1e-9
+    quads = np.stack([grid[:-1, :-1], grid[:-1, 1:], grid[1:, 1:], grid[1:, :-1]], axis=2)
+    return quads.reshape(-1, 4, 3)
+
+
+def main():
+    for n_verts in [10000, 100000, 1000000]:
+        quads = quad_grid(n_verts)
+        start = time.time()
+        new_verts, _ = face_index(quads)
+        elapsed = time.time() - start
+        line = '{:>8} verts -> {:>7} welded: {:7.3f} s'.format(quads.shape[0] * 4, len(new_verts), elapsed)
+        if n_verts <= 10000:
+            start = time.time()
+            face_index_quadratic(quads)
+            line += '  (quadratic: {:7.3f} s)'.format(time.time() - start)
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
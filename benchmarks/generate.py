@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Deterministic generator of large synthetic .obj/.mtl files for the benchmarks.
+
+Usage: python benchmarks/generate.py fname.obj [n_verts]
+"""
+from __future__ import print_function
+import sys
+from os import path
+import numpy as np
+
+_CORNER_FMTS = {(): '%d', ('vt',): '%d/%d', ('vn',): '%d//%d', ('vt', 'vn'): '%d/%d/%d'}
+
+
+def _face_lines(faces, n_cols, corner_fmt):
+    """Returns the 'f' lines of an (n_faces x arity) array of 1-based indices, used for every attribute."""
+    if not len(faces):
+        return []
+    row_fmt = 'f' + (' ' + corner_fmt) * faces.shape[1]
+    corners = np.repeat(faces, n_cols, axis=1)
+    return ((row_fmt + '\n') * len(faces) % tuple(corners.ravel().tolist())).splitlines()
+
+
+def write_mtl(fname, n_materials, seed=0):
+    """Writes a material library of n_materials materials named Material0, Material1, ..."""
+    rng = np.random.RandomState(seed)
+    with open(fname, 'w') as f:
+        for idx, (ka, kd, ks) in enumerate(rng.rand(n_materials, 3, 3)):
+            f.write('newmtl Material{}\nNs 96.078431\n'.format(idx))
+            f.write('Ka {:.6f} {:.6f} {:.6f}\nKd {:.6f} {:.6f} {:.6f}\nKs {:.6f} {:.6f} {:.6f}\n'.format(
+                *np.concatenate([ka, kd, ks])))
+            f.write('Ni 1.000000\nd 1.000000\nillum 2\nmap_Kd texture{}.png\n\n'.format(idx))
+
+
+def write_mesh(fname, n_verts=100000, attributes=('vt', 'vn'), n_objects=1, arity=3, n_materials=1,
+               faces_per_vert=2, seed=0):
+    """Writes an .obj file (and, if n_materials, a .mtl next to it) with random geometry, and returns its face count.
+
+    attributes lists the vertex attributes besides 'v' ('vt' and/or 'vn'), each with n_verts entries that faces
+    index the same way as their vertices.  arity is the number of vertices per face, or a sequence of arities to
+    mix, chosen at random per face.  The faces are split evenly into n_objects objects, and each object's faces
+    into runs using each of the n_materials materials in turn.  The same arguments always write the same file.
+    """
+    rng = np.random.RandomState(seed)
+    attributes = tuple(name for name in ('vt', 'vn') if name in attributes)
+    n_faces = int(faces_per_vert * n_verts)
+    arities = rng.choice(np.atleast_1d(arity), size=n_faces)
+    corner_fmt = _CORNER_FMTS[attributes]
+
+    lines = np.empty(n_faces, dtype=object)
+    for face_arity in np.unique(arities):
+        has_arity = arities == face_arity
+        faces = rng.randint(1, n_verts + 1, size=(int(has_arity.sum()), face_arity))
+        lines[has_arity] = _face_lines(faces, 1 + len(attributes), corner_fmt)
+
+    with open(fname, 'w') as f:
+        if n_materials:
+            fname_mtl = path.splitext(fname)[0] + '.mtl'
+            write_mtl(fname_mtl, n_materials, seed)
+            f.write('mtllib {}\n'.format(path.basename(fname_mtl)))
+        f.write('o Object0\n')  # The vertex pools are listed in the first object, as Blender does.
+        np.savetxt(f, rng.rand(n_verts, 3), fmt='v %.6f %.6f %.6f')
+        if 'vt' in attributes:
+            np.savetxt(f, rng.rand(n_verts, 2), fmt='vt %.6f %.6f')
+        if 'vn' in attributes:
+            np.savetxt(f, rng.rand(n_verts, 3), fmt='vn %.6f %.6f %.6f')
+
+        obj_bounds = np.linspace(0, n_faces, n_objects + 1).astype(int)
+        for obj_idx, (start, end) in enumerate(zip(obj_bounds[:-1], obj_bounds[1:])):
+            if obj_idx:
+                f.write('o Object{}\n'.format(obj_idx))
+            mtl_bounds = np.linspace(start, end, max(n_materials, 1) + 1).astype(int)
+            for mtl_idx, (mtl_start, mtl_end) in enumerate(zip(mtl_bounds[:-1], mtl_bounds[1:])):
+                f.write('usemtl Material{}\ns off\n'.format(mtl_idx) if n_materials else 's off\n')
+                f.write('\n'.join(lines[mtl_start:mtl_end]) + '\n' if mtl_end > mtl_start else '')
+    return n_faces
+
+
+if __name__ == '__main__':
+    write_mesh(sys.argv[1], *[int(arg) for arg in sys.argv[2:]])
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""Benchmark suite: read, write and round-trip throughput and peak memory on generated meshes.
+
+Usage: python benchmarks/suite.py [--scale 1.0] [--repeat 3] [--case NAME ...] [--json out.json]
+                                  [--compare baseline.json]
+
+Each case writes a deterministic mesh with generate.write_mesh() and times reading it (read_objfile,
+read_wavefront, and read_mtlfile on its material library), writing its triangles back out with WavefrontWriter,
+and reading that output again.  Times are the best of --repeat runs; peak memory is measured in a separate run
+with tracemalloc, which numpy reports its array buffers to.  Results saved with --json record the commit and
+versions they were measured on, and --compare prints each time relative to such a file from another commit.
+"""
+from __future__ import print_function
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from os import path
+import numpy as np
+
+sys.path.insert(0, path.join(path.dirname(__file__), '..'))
+from wavefront_reader import read_objfile, read_mtlfile, read_wavefront, material_cache, WavefrontWriter
+from generate import write_mesh
+
+# name: (write_mesh() arguments at scale 1, read_objfile() arguments).  Writing always starts from triangles.
+CASES = {
+    'tri_v_vt_vn': (dict(n_verts=200000), {}),
+    'tri_v': (dict(n_verts=200000, attributes=()), {}),
+    'quad_v_vn': (dict(n_verts=200000, attributes=('vn',), arity=4), {}),
+    'mixed_arity': (dict(n_verts=200000, arity=(3, 4, 5, 6)), dict(triangulate=True)),
+    'many_objects': (dict(n_verts=200000, n_objects=2000, n_materials=16), {}),
+    'many_materials': (dict(n_verts=20000, n_materials=5000), {}),
+}
+
+
+def measure(func, repeat):
+    """Returns func's best time over repeat runs, and its peak traced memory (in bytes) over one more run."""
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def _read_wavefront_uncached(fname, **kwargs):
+    """read_wavefront(), parsing the material library every time rather than taking it from material_cache."""
+    material_cache.invalidate()
+    return read_wavefront(fname, **kwargs)
+
+
+def _write_triangles(geoms, fname):
+    """Writes every object's faces (as per-corner vertex arrays) back out, with one normal per triangle."""
+    with open(fname, 'w') as f:
+        for name, geom in geoms.items():
+            verts = np.asarray(geom['v']).reshape(-1, 3)
+            normals = np.zeros((len(verts) // 3, 3))
+            WavefrontWriter.from_arrays(name, verts, normals).dump(f)
+
+
+def run_case(name, directory, scale=1.0, repeat=3):
+    """Generates one case's mesh and returns {operation: result dict} for it."""
+    mesh_args, read_args = CASES[name]
+    mesh_args = dict(mesh_args, n_verts=int(mesh_args['n_verts'] * scale))
+    fname = path.join(directory, name + '.obj')
+    write_mesh(fname, **mesh_args)
+    fname_mtl = path.splitext(fname)[0] + '.mtl'
+    fname_out = path.join(directory, name + '_out.obj')
+    geoms = read_objfile(fname, triangulate=True)
+    n_corners = sum(len(geom['v']) for geom in geoms.values())
+
+    operations = [
+        ('read_objfile', lambda: read_objfile(fname, **read_args), fname, mesh_args['n_verts']),
+        ('read_wavefront', lambda: _read_wavefront_uncached(fname, **read_args), fname, mesh_args['n_verts']),
+        ('read_mtlfile', lambda: read_mtlfile(fname_mtl), fname_mtl, None),
+        ('write', lambda: _write_triangles(geoms, fname_out), fname_out, n_corners),
+        ('round_trip', lambda: _write_triangles(read_objfile(fname, triangulate=True), fname_out) or
+         read_objfile(fname_out), fname, n_corners),
+    ]
+    results = {}
+    for operation, func, sized_file, n_verts in operations:
+        if operation == 'read_mtlfile' and mesh_args.get('n_materials', 1) <= 1:
+            continue  # Too small a library to time.
+        seconds, peak = measure(func, repeat)
+        size = path.getsize(sized_file)
+        results[operation] = {'seconds': seconds, 'mb_per_s': size / 1e6 / seconds,
+                              'verts_per_s': n_verts / seconds if n_verts is not None else None,
+                              'peak_mb': peak / 1e6, 'file_mb': size / 1e6}
+    return results
+
+
+def environment():
+    """Returns the commit and versions that results were measured with."""
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                         cwd=path.dirname(path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine()}
+
+
+def print_results(results, baseline=None):
+    header = '{:<16} {:<15} {:>9} {:>9} {:>12} {:>9}'.format('case', 'operation', 'seconds', 'MB/s', 'verts/s',
+                                                           'peak MB')
+    print(header + ('  vs baseline' if baseline else ''))
+    for case in sorted(results):
+        for operation, result in sorted(results[case].items()):
+            verts_per_s = '-'.rjust(12) if result['verts_per_s'] is None else '{:12.0f}'.format(result['verts_per_s'])
+            line = '{:<16} {:<15} {seconds:9.3f} {mb_per_s:9.1f} {} {peak_mb:9.1f}'.format(case, operation, verts_per_s,
+                                                                                        **result)
+            old = (baseline or {}).get(case, {}).get(operation)
+            if old:
+                line += '  {:10.2f}x'.format(old['seconds'] / result['seconds'])
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies every case\'s vertex count')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--case', action='append', choices=sorted(CASES), help='run only these cases')
+    parser.add_argument('--json', help='save the results to this file')
+    parser.add_argument('--compare', help='show speedups relative to results saved with --json')
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp()
+    try:
+        results = {case: run_case(case, directory, args.scale, args.repeat) for case in args.case or sorted(CASES)}
+    finally:
+        shutil.rmtree(directory)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            saved = json.load(f)
+        baseline = saved['results']
+        print('baseline: {}'.format(saved['environment']))
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'environment': environment(), 'scale': args.scale, 'results': results}, f, indent=2,
+                      sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
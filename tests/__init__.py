@@ -1 +1,14 @@
 # -*- coding: utf-8 -*-
+import numpy as np
+
+
+def assert_geoms_equal(geoms, expected):
+    """Asserts that two geoms dicts hold the same objects, with equal arrays and other properties."""
+    assert sorted(geoms) == sorted(expected)
+    for name, geom in expected.items():
+        assert set(geoms[name]) == set(geom)
+        for key, value in geom.items():
+            if isinstance(value, np.ndarray):
+                assert np.array_equal(geoms[name][key], value)
+            else:
+                assert geoms[name][key] == value
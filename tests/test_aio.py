@@ -0,0 +1,80 @@
+from os import path
+import sys
+import pytest
+from wavefront_reader import read_objfile, read_mtlfile, read_wavefront
+from . import assert_geoms_equal
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 5), reason="needs asyncio with async/await")
+
+filepath = path.join(path.split(__file__)[0], '..', 'examples')
+fnames = [path.join(filepath, name) for name in ['untitled.obj', 'untitled_with_normals_and_texcoords.obj',
+                                                 'two_complete_meshes.obj']]
+
+
+def run_all(make_coros):
+    """Runs the coroutines returned by make_coros() concurrently in a new event loop, returning their results."""
+    import asyncio
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        tasks = [loop.create_task(coro) for coro in make_coros()]
+        return loop.run_until_complete(asyncio.gather(*tasks))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+@pytest.mark.parametrize("fn", fnames)
+def test_read_objfile_async_matches_read_objfile(fn):
+    from wavefront_reader import read_objfile_async
+    geoms, = run_all(lambda: [read_objfile_async(fn, chunk_size=1000, indexed=True)])
+    assert_geoms_equal(geoms, read_objfile(fn, indexed=True))
+
+
+def test_concurrent_loads_with_limit():
+    import asyncio
+    from wavefront_reader import read_wavefront_async, read_mtlfile_async
+    fn_mtl = path.join(filepath, 'two_complete_meshes.mtl')
+
+    def loads():
+        semaphore = asyncio.Semaphore(2)
+        return ([read_wavefront_async(fn, semaphore=semaphore, chunk_size=4096) for fn in fnames] +
+                [read_mtlfile_async(fn_mtl, semaphore=semaphore)])
+
+    results = run_all(loads)
+    assert results[-1] == read_mtlfile(fn_mtl)
+    for fn, geoms in zip(fnames, results):
+        expected = read_wavefront(fn)
+        assert_geoms_equal(geoms, expected)
+        for name in expected:
+            assert geoms[name]['material'] == expected[name]['material']
+
+
+def test_cancelled_load_stops():
+    import asyncio
+    from wavefront_reader import read_objfile_async
+    loop = asyncio.new_event_loop()
+    try:
+        task = loop.create_task(read_objfile_async(fnames[-1], chunk_size=64))
+        loop.run_until_complete(asyncio.sleep(0.001))
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            loop.run_until_complete(task)
+    finally:
+        loop.close()
+
+
+def test_unsupported_options_fail_before_reading():
+    from wavefront_reader import read_objfile_async, read_wavefront_async
+    for func, kwargs in [(read_objfile_async, {'workers': 2}), (read_objfile_async, {'lazy': True}),
+                         (read_wavefront_async, {'cache': None})]:
+        with pytest.raises(TypeError):
+            run_all(lambda: [func(path.join(filepath, 'missing.obj'), **kwargs)])
+
+
+def test_stats_are_collected():
+    from wavefront_reader import read_objfile_async, Stats
+    fn, stats = fnames[-1], Stats()
+    run_all(lambda: [read_objfile_async(fn, stats=stats)])
+    assert stats.bytes['obj'] == path.getsize(fn)
+    assert stats.lines['f'] > 0 and 'build' in stats.timings
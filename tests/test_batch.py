@@ -0,0 +1,46 @@
+from os import path
+import shutil
+import pytest
+import numpy as np
+from wavefront_reader import read_wavefront, read_wavefront_batch
+import wavefront_reader.reading
+
+
+filepath = path.join(path.split(__file__)[0], '..', 'examples')
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_batch_matches_read_wavefront(processes):
+    results, errors = read_wavefront_batch(path.join(filepath, '*.obj'), workers=2, processes=processes)
+    assert not errors
+    assert len(results) == 5
+    for fname, geoms in results.items():
+        expected = read_wavefront(fname)
+        assert set(geoms) == set(expected)
+        for name, geom in geoms.items():
+            assert np.array_equal(geom['v'], expected[name]['v'])
+            assert geom.get('material') == expected[name].get('material')
+
+
+def test_bad_files_are_reported_without_stopping_batch(tmpdir):
+    broken = tmpdir.join('broken.obj')
+    broken.write('o Broken\nv 0 0 0\nv 1 0 0\nf 1 2 3\n')
+    fnames = [path.join(filepath, 'untitled.obj'), str(broken), str(tmpdir.join('missing.obj'))]
+    results, errors = read_wavefront_batch(fnames)
+    assert list(results) == [fnames[0]]
+    assert set(errors) == set(fnames[1:])
+
+
+def test_shared_material_library_is_parsed_once(tmpdir, monkeypatch):
+    for name in ['untitled.mtl', 'untitled.obj']:
+        shutil.copy(path.join(filepath, name), str(tmpdir))
+    for idx in range(3):
+        shutil.copy(str(tmpdir.join('untitled.obj')), str(tmpdir.join('copy{}.obj'.format(idx))))
+
+    calls = []
+    original = wavefront_reader.reading.read_mtlfile
+    monkeypatch.setattr(wavefront_reader.reading, 'read_mtlfile',
+                        lambda fname, **kwargs: calls.append(fname) or original(fname, **kwargs))
+    results, errors = read_wavefront_batch(str(tmpdir.join('*.obj')))
+    assert len(results) == 4 and not errors
+    assert len(calls) == 1
@@ -0,0 +1,79 @@
+from os import path
+import numpy as np
+import pytest
+from wavefront_reader import (read_wavefront, BinaryWriter, read_binary, read_binary_bounds, WavefrontWriter,
+                              read_objfile)
+
+filepath = path.join(path.split(__file__)[0], '..', 'examples')
+fnames = [path.join(filepath, name) for name in ['untitled_with_normals_and_texcoords.obj',
+                                                 'two_complete_meshes.obj']]
+
+
+@pytest.mark.parametrize("fn", fnames)
+@pytest.mark.parametrize("indexed", [False, True])
+def test_geoms_round_trip(tmpdir, fn, indexed):
+    geoms = read_wavefront(fn, indexed=indexed)
+    fname = str(tmpdir.join('mesh.wfm'))
+    BinaryWriter(geoms).dump(fname)
+    loaded = read_binary(fname)
+    assert sorted(loaded) == sorted(geoms)
+    for name, geom in geoms.items():
+        assert loaded[name]['material'] == geom['material']
+        for key in ['v', 'vt', 'vn', 'indices']:
+            if key in geom:
+                assert isinstance(loaded[name][key], np.memmap) or loaded[name][key].base is not None
+                assert np.array_equal(loaded[name][key], geom[key])
+
+
+@pytest.mark.parametrize("fn", fnames)
+def test_interleaved_geoms_store_only_the_interleaved_array(fn):
+    geoms = read_wavefront(fn, interleaved=True)
+    writer = BinaryWriter(geoms)
+    plain = BinaryWriter(read_wavefront(fn))
+    assert len(writer.dumps()) < len(plain.dumps())
+    loaded = read_binary(writer.dumps())
+    for name, geom in geoms.items():
+        for key in ['v', 'vt', 'vn']:
+            assert np.array_equal(loaded[name][key], geom[key])
+            if len(geom[key]):
+                assert np.shares_memory(loaded[name][key], loaded[name]['interleaved'])
+
+
+def test_read_binary_views_buffer():
+    data = BinaryWriter.from_arrays('Tri', np.eye(3), [[0, 0, 1]]).dumps()
+    geom = read_binary(data)['Tri']
+    assert np.shares_memory(geom['v'], np.frombuffer(data, dtype=np.uint8))
+    assert np.array_equal(geom['vn'], [[0, 0, 1]] * 3)
+
+
+def test_indexed_arrays_match_text_writer(tmpdir):
+    quads = np.array([[[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]],
+                      [[1, 0, 0], [2, 0, 0], [2, 1, 0], [1, 1, 0]]], dtype=float)
+    normals = np.array([[0, 0, 1], [0, 0, -1]], dtype=float)
+    geom = read_binary(BinaryWriter.from_indexed_arrays('Quads', quads, normals).dumps())['Quads']
+    fname = str(tmpdir.join('quads.obj'))
+    WavefrontWriter.from_indexed_arrays('Quads', quads, normals).dump(fname)
+    expected = read_objfile(fname)['Quads']
+    assert np.array_equal(geom['v'][geom['indices'].ravel()], expected['v'])
+    assert np.array_equal(geom['vn'][geom['indices'].ravel()], expected['vn'])
+
+
+@pytest.mark.parametrize("fn", fnames)
+def test_bounds_read_from_header(tmpdir, fn):
+    geoms = read_wavefront(fn, bounds=True)
+    fname = str(tmpdir.join('mesh.wfm'))
+    BinaryWriter(geoms).dump(fname)
+    assert read_binary_bounds(fname) == {name: geom['bounds'] for name, geom in geoms.items()}
+    assert read_binary(fname)[sorted(geoms)[0]]['bounds'] == geoms[sorted(geoms)[0]]['bounds']
+
+
+def test_array_constructors_add_bounds():
+    quads = np.array([[[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]],
+                      [[1, 0, 0], [2, 0, 0], [2, 1, 0], [1, 1, 0]]], dtype=float)
+    normals = np.array([[0, 0, 1], [0, 0, 1]], dtype=float)
+    for writer in [BinaryWriter.from_arrays('Quads', quads, normals, n_verts=4),
+                   BinaryWriter.from_indexed_arrays('Quads', quads, normals)]:
+        bounds = read_binary_bounds(writer.dumps())['Quads']
+        assert bounds['min'] == (0, 0, 0) and bounds['max'] == (2, 1, 0) and bounds['centroid'] == (1, 0.5, 0)
+        assert bounds['area'] == 2 and bounds['n_faces'] == 2 and bounds['n_triangles'] == 4
+    assert bounds['n_vertices'] == 8  # The shared edge's corners are split, as each face has its own normal.
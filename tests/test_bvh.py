@@ -0,0 +1,84 @@
+from os import path
+import numpy as np
+import pytest
+from wavefront_reader import read_objfile, BinaryWriter, read_binary, BVH, add_bvh
+from wavefront_reader.bvh import _ray_triangle_distances, _closest_triangle_points, _geom_triangles
+
+filepath = path.join(path.split(__file__)[0], '..', 'examples')
+
+
+def random_triangles(n, seed=0):
+    rng = np.random.RandomState(seed)
+    return rng.rand(n, 1, 3) * 10 + rng.rand(n, 3, 3)
+
+
+def test_tree_covers_every_triangle_once():
+    triangles = random_triangles(1000)
+    bvh = BVH(triangles, leaf_size=4)
+    assert sorted(bvh.order) == list(range(len(triangles)))
+    leaves = bvh.child < 0
+    assert bvh.count[leaves].sum() == len(triangles) and bvh.count[leaves].max() <= 4
+    for node in np.flatnonzero(leaves):
+        corners = triangles[bvh.order[bvh.start[node]:bvh.start[node] + bvh.count[node]]].reshape(-1, 3)
+        assert np.all(corners.min(axis=0) == bvh.lo[node]) and np.all(corners.max(axis=0) == bvh.hi[node])
+    for node in np.flatnonzero(~leaves):
+        children = [bvh.child[node], bvh.child[node] + 1]
+        assert np.all(bvh.lo[children].min(axis=0) == bvh.lo[node]) and bvh.count[children].sum() == bvh.count[node]
+
+
+def test_intersect_matches_brute_force():
+    rng = np.random.RandomState(1)
+    triangles = random_triangles(500)
+    origins, directions = rng.rand(200, 3) * 10, rng.randn(200, 3)
+    t, tri = BVH(triangles).intersect(origins, directions)
+    brute = np.array([_ray_triangle_distances(np.tile(origin, (len(triangles), 1)),
+                                              np.tile(direction, (len(triangles), 1)), triangles)
+                      for origin, direction in zip(origins, directions)])
+    assert np.isfinite(t).sum() > 10
+    assert np.array_equal(t, brute.min(axis=1))
+    assert np.array_equal(tri, np.where(np.isfinite(t), brute.argmin(axis=1), -1))
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.RandomState(2)
+    triangles = random_triangles(500)
+    points = rng.rand(200, 3) * 12 - 1
+    dist, tri, closest = BVH(triangles).nearest(points)
+    brute = np.array([np.linalg.norm(_closest_triangle_points(np.tile(point, (len(triangles), 1)), triangles) - point,
+                                     axis=1) for point in points])
+    assert np.allclose(dist, brute.min(axis=1))
+    assert np.allclose(np.linalg.norm(closest - points, axis=1), dist)
+    assert np.array_equal(tri, brute.argmin(axis=1))
+
+
+def test_closest_triangle_points_regions():
+    triangle = np.array([[[0, 0, 0], [1, 0, 0], [0, 1, 0]]], dtype=float)
+    points = np.array([[.2, .2, 1], [-1, -1, 0], [2, -1, 0], [0, 2, 0], [.5, -1, 0], [-1, .5, 0], [1, 1, 0]])
+    expected = [[.2, .2, 0], [0, 0, 0], [1, 0, 0], [0, 1, 0], [.5, 0, 0], [0, .5, 0], [.5, .5, 0]]
+    assert np.allclose(_closest_triangle_points(points, np.repeat(triangle, len(points), axis=0)), expected)
+
+
+@pytest.mark.parametrize("kwargs,arity", [({}, 4), ({'indexed': True}, None), ({'triangulate': True}, 3)])
+def test_geom_bvh_saved_with_binary_mesh(tmpdir, kwargs, arity):
+    geoms = add_bvh(read_objfile(path.join(filepath, 'untitled.obj'), **kwargs), arity=arity)
+    fname = str(tmpdir.join('mesh.wfm'))
+    BinaryWriter(geoms).dump(fname)
+    geom = read_binary(fname)['Cube']
+    bvh = BVH.from_geom(geom)
+    assert isinstance(bvh.order, np.memmap) or bvh.order.base is not None
+    t, tri = bvh.intersect([[0, 0, 5], [3, 3, 3]], [[0, 0, -1], [1, 0, 0]])
+    assert np.allclose(t, [4, np.inf]) and tri[1] == -1
+    dist, _, closest = bvh.nearest([[0.5, 0.25, 3]])
+    assert np.allclose(dist, 2, atol=1e-5) and np.allclose(closest, [[0.5, 0.25, 1]], atol=1e-5)
+
+
+def test_non_indexed_quads_are_triangulated():
+    geom = read_objfile(path.join(filepath, 'untitled.obj'))['Cube']  # 6 quads: 24 corners.
+    assert 'arity' not in geom
+    with pytest.raises(ValueError):
+        BVH.from_geom(geom)
+    triangles = _geom_triangles(geom, arity=4)
+    assert len(triangles) == 12
+    quads = geom['v'].reshape(-1, 4, 3)
+    assert np.array_equal(triangles[::2], quads[:, :3]) and np.array_equal(triangles[1::2], quads[:, [0, 2, 3]])
+    assert len(BVH.from_geom(geom, arity=4).order) == 12
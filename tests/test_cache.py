@@ -0,0 +1,102 @@
+from os import path
+import os
+import shutil
+import pytest
+import numpy as np
+from wavefront_reader import read_wavefront, WavefrontCache
+from wavefront_reader.cache import _file_hash
+from . import assert_geoms_equal
+
+
+filepath = path.join(path.split(__file__)[0], '..', 'examples')
+
+filenames = ['untitled.obj',
+             'untitled_with_normals.obj',
+             'untitled_with_normals_and_texcoords.obj',
+             'two_complete_meshes.obj',
+             'bad_file.obj'
+             ]
+
+fnames = [path.join(filepath, name) for name in filenames]
+
+
+@pytest.mark.parametrize("fn", fnames)
+@pytest.mark.parametrize("indexed", [False, True])
+def test_cached_geoms_match_parsed_geoms(tmpdir, fn, indexed):
+    cache = WavefrontCache(str(tmpdir.join('cache')))
+    expected = read_wavefront(fn, indexed=indexed)
+    read_wavefront(fn, indexed=indexed, cache=cache)
+    assert cache.get(fn, indexed=indexed) is not None
+    assert_geoms_equal(read_wavefront(fn, indexed=indexed, cache=cache), expected)
+
+
+def test_interleaved_views_are_rebuilt(tmpdir):
+    cache = WavefrontCache(str(tmpdir.join('cache')))
+    fn = fnames[2]
+    expected = read_wavefront(fn, interleaved=True)
+    read_wavefront(fn, interleaved=True, cache=cache)
+    geoms = cache.get(fn, interleaved=True)
+    assert_geoms_equal(geoms, expected)
+    for geom in geoms.values():
+        assert np.shares_memory(geom['v'], geom['interleaved'])
+
+
+def test_modified_source_invalidates_entry(tmpdir):
+    for name in ['untitled.obj', 'untitled.mtl']:
+        shutil.copy(path.join(filepath, name), str(tmpdir))
+    fn = str(tmpdir.join('untitled.obj'))
+    cache = WavefrontCache(str(tmpdir.join('cache')))
+    cache.read_wavefront(fn)
+
+    stat = os.stat(fn)
+    os.utime(fn, (stat.st_atime, stat.st_mtime + 10))
+    assert cache.get(fn) is not None  # Same contents, only touched.
+
+    with open(fn, 'a') as f:
+        f.write('# edited\n')
+    assert cache.get(fn) is None
+
+
+def test_eviction_keeps_cache_within_max_size(tmpdir):
+    cache = WavefrontCache(str(tmpdir.join('cache')), max_size=1)
+    for fn in fnames[:3]:
+        cache.read_wavefront(fn)
+    assert len(os.listdir(cache.directory)) <= 1
+
+
+def test_bounds_without_loading_arrays(tmpdir):
+    cache = WavefrontCache(str(tmpdir.join('cache')))
+    fn = path.join(filepath, 'two_complete_meshes.obj')
+    assert cache.get_bounds(fn, bounds=True) is None
+    geoms = read_wavefront(fn, bounds=True, cache=cache)
+    assert cache.get_bounds(fn, bounds=True) == {name: geom['bounds'] for name, geom in geoms.items()}
+    assert cache.get_bounds(fn) is None
+
+
+def test_lazy_reads_bypass_cache(tmpdir):
+    cache = WavefrontCache(str(tmpdir.join('cache')))
+    fn = path.join(filepath, 'two_complete_meshes.obj')
+    geoms = read_wavefront(fn, lazy=True, cache=cache)
+    assert sorted(geoms) == sorted(read_wavefront(fn))
+    assert os.listdir(cache.directory) == []
+
+
+def test_failed_write_leaves_no_temp_file(tmpdir):
+    cache = WavefrontCache(str(tmpdir.join('cache')))
+    with pytest.raises(TypeError):
+        cache.put(fnames[0], {'Cube': {'o': object()}}, [fnames[0]])
+    assert os.listdir(cache.directory) == []
+
+
+def test_touched_source_is_hashed_once(tmpdir, monkeypatch):
+    import wavefront_reader.cache as cache_module
+    for name in ['untitled.obj', 'untitled.mtl']:
+        shutil.copy(path.join(filepath, name), str(tmpdir))
+    fn = str(tmpdir.join('untitled.obj'))
+    cache = WavefrontCache(str(tmpdir.join('cache')))
+    cache.read_wavefront(fn)
+    os.utime(fn, (1e9, 1e9))
+    hashed = []
+    monkeypatch.setattr(cache_module, '_file_hash', lambda fname: hashed.append(fname) or _file_hash(fname))
+    assert cache.get(fn) is not None and cache.get(fn) is not None
+    assert hashed == [fn]
@@ -0,0 +1,61 @@
+from os import path
+import numpy as np
+import pytest
+from wavefront_reader import read_objfile, IncrementalReader
+from . import assert_geoms_equal
+
+filepath = path.join(path.split(__file__)[0], '..', 'examples')
+source = path.join(filepath, 'two_complete_meshes.obj')
+
+
+def test_appended_data_is_parsed_incrementally(tmpdir):
+    with open(source, 'rb') as f:
+        data = f.read()
+    fn = tmpdir.join('growing.obj')
+    reader = IncrementalReader(str(fn))
+    written = 0
+    for stop in [len(data) // 3, len(data) // 3 + 7, 2 * len(data) // 3, len(data)]:
+        with open(str(fn), 'ab') as f:
+            f.write(data[written:stop])
+        written = stop
+        assert_geoms_equal(reader.refresh(), read_objfile(data[:data.rfind(b'\n', 0, stop) + 1]))
+    assert reader.n_full_parses == 1
+    assert reader.offset == len(data)
+
+
+def test_changed_prefix_is_reparsed(tmpdir):
+    fn = tmpdir.join('edited.obj')
+    fn.write('o Tri\nv 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n')
+    reader = IncrementalReader(str(fn))
+    assert reader.refresh()['Tri']['v'][1, 0] == 1
+    fn.write('o Tri\nv 0 0 0\nv 5 0 0\nv 0 1 0\nf 1 2 3\no Next\n')
+    assert reader.refresh()['Tri']['v'][1, 0] == 5
+    assert reader.n_full_parses == 2
+
+
+def test_same_size_edit_is_reparsed(tmpdir):
+    fn = tmpdir.join('edited.obj')
+    lines = ['o Big\n'] + ['v {}.000 0 0\n'.format(idx) for idx in range(3000)] + ['f 1 2 3\n']
+    fn.write(''.join(lines))
+    reader = IncrementalReader(str(fn))
+    assert reader.refresh()['Big']['v'][0, 0] == 0
+    lines[1501] = 'v 9999.000 0 0\n'[:len(lines[1501])]
+    fn.write(''.join(lines) + 'f 1 2 1501\n')
+    assert reader.refresh()['Big']['v'][-1, 0] == read_objfile(str(fn))['Big']['v'][-1, 0] == 9999
+    assert reader.n_full_parses == 2
+
+
+def test_open_object_grows_in_place(tmpdir):
+    fn = tmpdir.join('growing.obj')
+    fn.write('o Tri\nv 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n')
+    reader = IncrementalReader(str(fn))
+    first = reader.refresh()['Tri']['v']
+    with open(str(fn), 'a') as f:
+        f.write('v 1 1 0\nf 2 4 3\n')
+    geom = reader.refresh()['Tri']
+    assert np.shares_memory(first, geom['v'])
+    assert_geoms_equal({'Tri': geom}, read_objfile(str(fn)))
+    with open(str(fn), 'a') as f:
+        f.write('f 1 2 3 4\n')
+    with pytest.raises(ValueError):
+        reader.refresh()
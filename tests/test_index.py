@@ -0,0 +1,90 @@
+from os import path
+import shutil
+import pytest
+import numpy as np
+from wavefront_reader import read_objfile, read_wavefront, LazyGeoms, ObjIndex, read_object
+from . import assert_geoms_equal
+
+
+filepath = path.join(path.split(__file__)[0], '..', 'examples')
+
+filenames = ['untitled.obj',
+             'untitled_with_normals.obj',
+             'untitled_with_normals_and_texcoords.obj',
+             'two_complete_meshes.obj',
+             'bad_file.obj'
+             ]
+
+fnames = [path.join(filepath, name) for name in filenames]
+
+
+@pytest.mark.parametrize("fn", fnames)
+@pytest.mark.parametrize("indexed", [False, True])
+def test_lazy_geoms_match_read_objfile(fn, indexed):
+    lazy = read_objfile(fn, lazy=True, indexed=indexed)
+    assert isinstance(lazy, LazyGeoms)
+    geoms = read_objfile(fn, indexed=indexed)
+    assert list(lazy) == list(geoms)
+    assert_geoms_equal(lazy, geoms)
+
+
+def test_objects_are_parsed_on_first_access_and_cached():
+    geoms = read_objfile(path.join(filepath, 'two_complete_meshes.obj'), lazy=True)
+    assert len(geoms) == 2 and 'Cube' in geoms
+    assert not geoms._geoms
+    cube = geoms['Cube']
+    assert list(geoms._geoms) == ['Cube']
+    assert geoms['Cube'] is cube
+
+
+def test_lazy_read_wavefront_attaches_materials():
+    geoms = read_wavefront(path.join(filepath, 'two_complete_meshes.obj'), lazy=True)
+    assert geoms['Cube']['material']['Kd'] == (0.64, 0.64, 0.24)
+
+
+def test_index_sidecar_round_trip(tmpdir):
+    fn = str(tmpdir.join('two_complete_meshes.obj'))
+    shutil.copy(path.join(filepath, 'two_complete_meshes.obj'), fn)
+    index = ObjIndex.build(fn)
+    assert index.objects['Cube']['pool_offsets'] == {'v': 482, 'vt': 604, 'vn': 586}
+    assert index.objects['Cube']['n_faces'] == 12
+
+    loaded = ObjIndex.load(index.save())
+    assert loaded.objects == index.objects
+    assert loaded.is_current()
+    with open(fn, 'a') as f:
+        f.write('# edited\n')
+    assert not loaded.is_current()
+
+
+def test_read_object_builds_missing_sidecar_and_loads_one_object(tmpdir):
+    fn = str(tmpdir.join('two_complete_meshes.obj'))
+    shutil.copy(path.join(filepath, 'two_complete_meshes.obj'), fn)
+    cube = read_object(fn, 'Cube')
+    assert path.exists(fn + ObjIndex.suffix)
+    assert_geoms_equal({'Cube': cube}, {'Cube': read_objfile(fn)['Cube']})
+    assert np.array_equal(read_object(fn, 'Sphere')['vn'], read_objfile(fn)['Sphere']['vn'])
+
+
+def test_read_object_works_when_sidecar_cannot_be_saved(tmpdir, monkeypatch):
+    fn = str(tmpdir.join('two_complete_meshes.obj'))
+    shutil.copy(path.join(filepath, 'two_complete_meshes.obj'), fn)
+
+    def save(self, fname=None):
+        raise OSError(13, 'Permission denied')
+    monkeypatch.setattr(ObjIndex, 'save', save)
+    cube = read_object(fn, 'Cube')
+    assert not path.exists(fn + ObjIndex.suffix)
+    assert_geoms_equal({'Cube': cube}, {'Cube': read_objfile(fn)['Cube']})
+
+
+def test_random_access_accepts_path_objects(tmpdir):
+    import pathlib
+    fn = pathlib.Path(str(tmpdir.join('two_complete_meshes.obj')))
+    shutil.copy(path.join(filepath, 'two_complete_meshes.obj'), str(fn))
+    expected = read_objfile(str(fn))
+    assert_geoms_equal({'Cube': read_object(fn, 'Cube')}, {'Cube': expected['Cube']})
+    assert path.exists(str(fn) + ObjIndex.suffix)
+    index = ObjIndex.build(fn)
+    assert index.source['path'] == str(fn) and index.is_current(fn)
+    assert_geoms_equal(LazyGeoms(fn, index=index), expected)
@@ -1,6 +1,6 @@
 from os import path
 import pytest
-from wavefront_reader import read_mtlfile
+from wavefront_reader import read_mtlfile, MaterialCache
 
 filepath = path.join(path.split(__file__)[0], '..', 'examples')
 
@@ -42,3 +42,35 @@ def test_illum(fn, illum):
     materials = read_mtlfile(fn)
     assert materials['Material']['illum'] == illum
     assert isinstance(materials['Material']['illum'], int)
+
+
+@pytest.mark.parametrize("fn, diffuse", list(zip(fnames, [(0.64, 0.64, 0.64),
+                                                          (0.64, 0.6, 0.64),
+                                                          (0.64, 0.64, 0.64),
+                                                          (0.64, 0.64, 0.24)])))
+def test_structured_materials(fn, diffuse):
+    materials = read_mtlfile(fn, structured=True)
+    record = materials[materials['name'] == 'Material'][0]
+    assert tuple(record['Kd']) == diffuse
+    assert materials['illum'].dtype.kind == 'i'
+
+
+def test_texture_maps_are_kept_as_strings(tmpdir):
+    fn = tmpdir.join('textured.mtl')
+    fn.write('newmtl Brick\nKd 1 0.5 0.5\nmap_Kd brick.png\nillum 2\n')
+    materials = read_mtlfile(str(fn))
+    assert materials['Brick']['map_Kd'] == 'brick.png'
+    assert read_mtlfile(str(fn), structured=True)['map_Kd'][0] == 'brick.png'
+
+
+def test_material_cache_reparses_changed_files(tmpdir):
+    fn = tmpdir.join('cached.mtl')
+    fn.write('newmtl A\nillum 2\n')
+    cache = MaterialCache(maxsize=1)
+    first = cache.read_mtlfile(str(fn))
+    assert cache.read_mtlfile(str(fn)) is first
+
+    fn.write('newmtl A\nillum 3\n')
+    assert cache.read_mtlfile(str(fn))['A']['illum'] == 3
+    cache.invalidate(str(fn))
+    assert cache.read_mtlfile(str(fn)) is not first
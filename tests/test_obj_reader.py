@@ -7,9 +7,11 @@ test_wavefront_reader
 
 Tests for `wavefront_reader` module.
 """
+import io
 from os import path
 import pytest
-from wavefront_reader import read_objfile
+import numpy as np
+from wavefront_reader import read_objfile, iter_objfile
 
 filepath = path.join(path.split(__file__)[0], '..', 'examples')
 
@@ -63,3 +65,370 @@ def test_has_correct_number_of_meshes(objfile, count):
     assert len(geoms) == count
 
 
+def write_obj(tmpdir, text, name='test.obj'):
+    fname = tmpdir.join(name)
+    fname.write_binary(text.encode())
+    return str(fname)
+
+
+TRIANGLE_OBJ = """# comment
+o Tri
+v 0.0 0.0 0.0
+v 1.0 0.0 0.0
+v 0.0 1.5e0 0.0
+vn 0.0 0.0 1.0
+usemtl Material
+s off
+f 1//1 2//1 3//1
+"""
+
+
+@pytest.mark.parametrize("newline", ['\n', '\r\n'])
+def test_bulk_parser_matches_expected_values(tmpdir, newline):
+    geoms = read_objfile(write_obj(tmpdir, TRIANGLE_OBJ.replace('\n', newline)))
+    tri = geoms['Tri']
+    assert np.array_equal(tri['v'], [[0., 0., 0.], [1., 0., 0.], [0., 1.5, 0.]])
+    assert np.array_equal(tri['vn'], [[0., 0., 1.]] * 3)
+    assert tri['vt'] == tuple()
+    assert tri['usemtl'] == 'Material'
+
+
+def test_bulk_parser_handles_mixed_face_layouts(tmpdir):
+    text = TRIANGLE_OBJ + "vt 0.5 0.5\nf 1/1/1 2/1/1 3/1/1\n    f 3//1 2//1 1//1\n"
+    with pytest.raises(ValueError):
+        read_objfile(write_obj(tmpdir, text))
+
+
+def test_file_without_object_statement_is_named_after_file(tmpdir):
+    fname = write_obj(tmpdir, "v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n")
+    geoms = read_objfile(fname)
+    assert list(geoms) == [fname]
+    assert geoms[fname]['v'].shape == (3, 3)
+
+
+@pytest.mark.parametrize("objfile", fnames)
+def test_indexed_mode_reconstructs_expanded_arrays(objfile):
+    expanded = read_objfile(objfile)
+    indexed = read_objfile(objfile, indexed=True)
+    for name, geom in indexed.items():
+        assert geom['indices'].dtype == np.uint16
+        assert len(geom['v']) <= len(expanded[name]['v'])
+        for coord in ['v', 'vt', 'vn']:
+            if len(geom[coord]):
+                assert np.array_equal(geom[coord][geom['indices'].ravel()], expanded[name][coord])
+
+
+def test_index_dtype_grows_with_vertex_count():
+    from wavefront_reader.reading import _index_dtype
+    assert _index_dtype(65536) == np.uint16
+    assert _index_dtype(65537) == np.uint32
+
+
+@pytest.mark.parametrize("objfile", fnames)
+def test_iter_objfile_matches_read_objfile_across_chunk_sizes(objfile):
+    geoms = read_objfile(objfile)
+    streamed = list(iter_objfile(objfile, chunk_size=100))
+    assert sorted(geom['o'] for geom in streamed) == sorted(geoms)
+    for geom in streamed:
+        for coord in ['v', 'vt', 'vn']:
+            assert np.array_equal(geom[coord], geoms[geom['o']][coord])
+
+
+def test_iter_objfile_yields_objects_in_file_order():
+    names = [geom['o'] for geom in iter_objfile(path.join(filepath, 'two_complete_meshes.obj'))]
+    assert names == ['Sphere', 'Cube']
+
+
+def test_read_objfile_resolves_forward_references_across_chunks():
+    from wavefront_reader.reading import _read_objfile_sequential
+    data = b'o A\nv 0 0 0\nv 1 0 0\nf 1 2 4\no B\nv 5 5 5\nv 0 1 0\nf 1 2 3\n'
+    with pytest.raises(IndexError):
+        list(iter_objfile(data, chunk_size=16))
+    for chunk_size in [16, 1 << 24]:
+        geoms = _read_objfile_sequential(data, np.float64, False, {}, chunk_size=chunk_size)
+        assert np.array_equal(geoms['A']['v'], [[0, 0, 0], [1, 0, 0], [0, 1, 0]])
+        assert np.array_equal(geoms['B']['v'], [[0, 0, 0], [1, 0, 0], [5, 5, 5]])
+    assert np.array_equal(read_objfile(data)['A']['v'], geoms['A']['v'])
+
+
+@pytest.mark.parametrize("objfile", fnames + [path.join(filepath, 'bad_file.obj')])
+@pytest.mark.parametrize("workers", [2, 7])
+def test_parallel_parse_matches_serial(objfile, workers):
+    serial = read_objfile(objfile)
+    parallel = read_objfile(objfile, workers=workers)
+    assert list(parallel) == list(serial)
+    for name, geom in serial.items():
+        assert set(parallel[name]) == set(geom)
+        for key, value in geom.items():
+            if isinstance(value, np.ndarray):
+                assert np.array_equal(parallel[name][key], value)
+            else:
+                assert parallel[name][key] == value
+
+
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview, io.BytesIO])
+def test_read_objfile_accepts_in_memory_sources(wrap):
+    fname = path.join(filepath, 'two_complete_meshes.obj')
+    with open(fname, 'rb') as f:
+        data = f.read()
+    expected = read_objfile(fname)
+    geoms = read_objfile(wrap(data))
+    assert list(geoms) == list(expected)
+    for name, geom in geoms.items():
+        assert np.array_equal(geom['v'], expected[name]['v'])
+        assert np.array_equal(geom['vn'], expected[name]['vn'])
+
+
+def test_read_objfile_accepts_text_file_objects():
+    with open(path.join(filepath, 'untitled.obj')) as f:
+        geoms = read_objfile(f)
+    assert geoms['Cube']['v'].shape == (24, 3)
+
+
+def test_dtypes_are_applied_while_parsing():
+    fname = path.join(filepath, 'untitled_with_normals_and_texcoords.obj')
+    expected = read_objfile(fname)['Cube']
+    cube = read_objfile(fname, indexed=True, vertex_dtype=np.float32, index_dtype=np.uint32)['Cube']
+    assert cube['indices'].dtype == np.uint32
+    for coord in ['v', 'vt', 'vn']:
+        assert cube[coord].dtype == np.float32
+        assert np.allclose(cube[coord][cube['indices'].ravel()], expected[coord])
+
+
+@pytest.mark.parametrize("objfile", fnames)
+def test_interleaved_array_holds_all_attributes(objfile):
+    expected = read_objfile(objfile)
+    for name, geom in read_objfile(objfile, interleaved=True).items():
+        columns = [expected[name][coord] for coord in ['v', 'vt', 'vn'] if len(expected[name][coord])]
+        assert np.array_equal(geom['interleaved'], np.hstack(columns))
+        assert np.shares_memory(geom['v'], geom['interleaved'])
+
+
+MULTI_MATERIAL_OBJ = """o Quad
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+g top
+usemtl Red
+f 1 2 3
+usemtl Blue
+f 1 3 4
+f 2 3 4
+g bottom
+usemtl Red
+f 1 2 4
+"""
+
+
+@pytest.mark.parametrize("kwargs", [{}, {'indexed': True}, {'workers': 2}, {'lazy': True}])
+def test_submeshes_group_faces_by_material(tmpdir, kwargs):
+    geom = read_objfile(write_obj(tmpdir, MULTI_MATERIAL_OBJ), submeshes=True, **kwargs)['Quad']
+    submeshes = [(sub['usemtl'], sub['start'], sub['count']) for sub in geom['submeshes']]
+    assert submeshes == [('Red', 0, 6), ('Blue', 6, 6)]
+    corners = geom['v'][geom['indices'].ravel()] if 'indices' in geom else geom['v']
+    assert np.array_equal(corners[:6, :2], [[0, 0], [1, 0], [1, 1], [0, 0], [1, 0], [0, 1]])
+    assert np.array_equal(corners[6:, :2], [[0, 0], [1, 1], [0, 1], [1, 0], [1, 1], [0, 1]])
+
+
+def test_submeshes_by_several_statements(tmpdir):
+    geom = read_objfile(write_obj(tmpdir, MULTI_MATERIAL_OBJ), submeshes=('g', 'usemtl'))['Quad']
+    assert [(sub['g'], sub['usemtl'], sub['count']) for sub in geom['submeshes']] == [
+        ('top', 'Red', 3), ('top', 'Blue', 6), ('bottom', 'Red', 3)]
+
+
+MIXED_ARITY_OBJ = """o Mixed
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+v 2 0 0
+vn 0 0 1
+f 1//1 2//1 3//1
+f 1//1 2//1 3//1 4//1
+f 2//1 5//1 3//1 4//1 1//1
+ f 1//1 3//1 4//1 5//1
+"""
+
+
+@pytest.mark.parametrize("kwargs", [{}, {'indexed': True}, {'workers': 2}, {'lazy': True}])
+def test_triangulate_mixed_arity_faces(tmpdir, kwargs):
+    geom = read_objfile(write_obj(tmpdir, MIXED_ARITY_OBJ), triangulate=True, **kwargs)['Mixed']
+    corners = geom['v'][geom['indices'].ravel()] if 'indices' in geom else geom['v']
+    expected = [[1, 2, 3], [1, 2, 3], [1, 3, 4], [2, 5, 3], [2, 3, 4], [2, 4, 1], [1, 3, 4], [1, 4, 5]]
+    v = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 0]], dtype=float)
+    assert np.array_equal(corners, v[np.array(expected).ravel() - 1])
+    assert len(geom['vn']) == len(geom['v'])
+
+
+def test_mixed_arity_faces_need_triangulate(tmpdir):
+    with pytest.raises(ValueError):
+        read_objfile(write_obj(tmpdir, MIXED_ARITY_OBJ))
+
+
+COINCIDENT_ARITY_OBJ = """o Coincident
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+v 2 0 0
+f 1 2 3 4
+f 1 2 3
+f 1 2 3 4 5
+"""
+
+
+def test_mixed_arity_faces_with_uniform_total_are_not_reshaped(tmpdir):
+    # 4 + 3 + 5 corners add up to 3 faces of the first face's 4 vertices.
+    with pytest.raises(ValueError):
+        read_objfile(write_obj(tmpdir, COINCIDENT_ARITY_OBJ))
+
+
+def test_triangulate_mixed_arity_faces_with_uniform_total():
+    geom = read_objfile(COINCIDENT_ARITY_OBJ.encode(), triangulate=True)['Coincident']
+    expected = [[1, 2, 3], [1, 3, 4], [1, 2, 3], [1, 2, 3], [1, 3, 4], [1, 4, 5]]
+    v = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 0]], dtype=float)
+    assert np.array_equal(geom['v'], v[np.array(expected).ravel() - 1])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_triangulated_random_mixed_arity_matches_fan(seed):
+    rng = np.random.RandomState(seed)
+    lines, triangles, materials, material = ['o Mesh'], [], [], None
+    lines += ['v {} {} {}'.format(*rng.randint(0, 100, 3)) for _ in range(20)]
+    for _ in range(rng.randint(1, 40)):
+        if rng.rand() < 0.2:
+            material = 'mat{}'.format(rng.randint(3))
+            lines.append('usemtl ' + material)
+        face = rng.randint(1, 21, rng.choice([3, 4, 5, 6]))
+        lines.append('f ' + ' '.join(str(idx) for idx in face))
+        triangles += [[face[0], face[k], face[k + 1]] for k in range(1, len(face) - 1)]
+        materials += [material] * (len(face) - 2)
+    data = ('\n'.join(lines) + '\n').encode()
+    v = np.array([line.split()[1:] for line in lines if line.startswith('v ')], dtype=float)
+
+    assert np.array_equal(read_objfile(data, triangulate=True)['Mesh']['v'], v[np.array(triangles).ravel() - 1])
+    for chunk_size in [16, 64]:
+        streamed, = iter_objfile(data, triangulate=True, chunk_size=chunk_size)
+        assert np.array_equal(streamed['v'], v[np.array(triangles).ravel() - 1])
+    first_use = sorted(set(materials), key=materials.index)
+    order = sorted(range(len(triangles)), key=lambda idx: (first_use.index(materials[idx]), idx))
+    geom = read_objfile(data, triangulate=True, submeshes=True)['Mesh']
+    assert np.array_equal(geom['v'], v[np.array(triangles)[order].ravel() - 1])
+
+
+def test_relative_indices_match_absolute_ones(tmpdir):
+    objfile = path.join(filepath, 'two_complete_meshes.obj')
+    expected = read_objfile(objfile)
+    lines, counts = [], {'v': 0, 'vt': 0, 'vn': 0}
+    with open(objfile) as f:
+        for line in f:
+            prefix = line.split(' ', 1)[0]
+            if prefix in counts:
+                counts[prefix] += 1
+            elif prefix == 'f':
+                corners = [corner.split('/') for corner in line.split()[1:]]
+                line = 'f ' + ' '.join('/'.join(str(int(idx) - counts[name] - 1) if idx else ''
+                                                for idx, name in zip(corner, ['v', 'vt', 'vn']))
+                                       for corner in corners) + '\n'
+            lines.append(line)
+    fname = write_obj(tmpdir, ''.join(lines))
+    for kwargs in [{}, {'workers': 3}, {'lazy': True}]:
+        geoms = read_objfile(fname, **kwargs)
+        for name in expected:
+            for coord in ['v', 'vt', 'vn']:
+                assert np.array_equal(geoms[name][coord], expected[name][coord])
+
+
+@pytest.mark.parametrize("normals", ['flat', 'area', 'angle'])
+@pytest.mark.parametrize("kwargs", [{}, {'indexed': True}, {'workers': 2}, {'lazy': True}])
+def test_generated_normals_match_file_normals(normals, kwargs):
+    expected = read_objfile(path.join(filepath, 'untitled_with_normals.obj'), **kwargs)['Cube']  # 's off': flat.
+    geom = read_objfile(path.join(filepath, 'untitled.obj'), normals=normals, **kwargs)['Cube']
+    assert np.allclose(geom['vn'], expected['vn'], atol=1e-6)
+    if 'indices' in geom:
+        assert np.array_equal(geom['indices'], expected['indices'])
+
+
+SMOOTH_CUBE_OBJ = """o Cube
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+v 0 0 1
+v 1 0 1
+v 1 1 1
+v 0 1 1
+s 1
+f 1 4 3 2
+f 5 6 7 8
+f 1 2 6 5
+f 2 3 7 6
+s 2
+f 3 4 8 7
+f 4 1 5 8
+"""
+
+
+@pytest.mark.parametrize("normals", ['area', 'angle'])
+def test_generated_smooth_normals_follow_smoothing_groups(tmpdir, normals):
+    geom = read_objfile(write_obj(tmpdir, SMOOTH_CUBE_OBJ), normals=normals, indexed=True)['Cube']
+    assert len(geom['v']) == 14  # The 8 corners, with the 6 used by both smoothing groups split in two.
+    assert np.allclose(np.linalg.norm(geom['vn'], axis=1), 1)
+    for v, n in zip(geom['v'], geom['vn']):
+        if tuple(v) in [(1, 0, 0), (1, 0, 1)]:  # Only in group 1, where they are cube corners.
+            assert np.allclose(n, (v - 0.5) * 2 / np.sqrt(3))
+
+
+def test_generated_normals_keep_file_normals(tmpdir):
+    objfile = path.join(filepath, 'untitled_with_normals.obj')
+    assert np.array_equal(read_objfile(objfile, normals='area')['Cube']['vn'], read_objfile(objfile)['Cube']['vn'])
+    with pytest.raises(ValueError):
+        read_objfile(objfile, normals='smooth')
+
+
+@pytest.mark.parametrize("kwargs", [{}, {'indexed': True}, {'triangulate': True}, {'workers': 2}, {'lazy': True}])
+def test_bounds(kwargs):
+    geom = read_objfile(path.join(filepath, 'untitled.obj'), bounds=True, **kwargs)['Cube']
+    bounds = geom['bounds']
+    assert np.allclose(bounds['min'], [-1, -1, -1], atol=1e-5) and np.allclose(bounds['max'], [1, 1, 1], atol=1e-5)
+    assert np.allclose(bounds['center'], 0, atol=1e-5) and np.allclose(bounds['centroid'], 0, atol=1e-5)
+    assert np.isclose(bounds['radius'], np.sqrt(3), atol=1e-5)
+    assert np.isclose(bounds['area'], 24, atol=1e-4)
+    assert bounds['n_faces'] == (12 if kwargs.get('triangulate') else 6)
+    assert bounds['n_triangles'] == 12
+    assert bounds['n_vertices'] == len(geom['v'])
+    assert 'bounds' not in read_objfile(path.join(filepath, 'untitled.obj'), **kwargs)['Cube']
+
+
+COLORED_VERTS_OBJ = b"""o Colored
+v 0 0 0 1 0 0
+v 2 0 0 0 1 0
+v 0 2 0 0 0 1
+f 1 2 3
+"""
+
+
+@pytest.mark.parametrize("mode", ['flat', 'area', 'angle'])
+def test_generated_normals_leave_out_vertex_colors(mode):
+    geom = read_objfile(COLORED_VERTS_OBJ, normals=mode)['Colored']
+    assert np.allclose(geom['vn'], [[0, 0, 1]] * 3)
+    assert geom['v'].shape == (3, 6)
+
+
+def test_bounds_leave_out_vertex_colors():
+    bounds = read_objfile(COLORED_VERTS_OBJ, bounds=True)['Colored']['bounds']
+    assert bounds['min'] == (0, 0, 0) and bounds['max'] == (2, 2, 0)
+    assert bounds['center'] == (1, 1, 0) and np.isclose(bounds['area'], 2)
+
+
+def test_path_objects_and_bytes_filenames():
+    import pathlib
+    objfile = path.join(filepath, 'two_complete_meshes.obj')
+    expected = read_objfile(objfile)
+    for kwargs in [{}, {'workers': 2}, {'lazy': True}]:
+        geoms = read_objfile(pathlib.Path(objfile), **kwargs)
+        assert sorted(geoms) == sorted(expected)
+        assert all(np.array_equal(geoms[name]['v'], expected[name]['v']) for name in expected)
+    with pytest.raises(ValueError):
+        read_objfile(objfile.encode())
@@ -0,0 +1,38 @@
+from os import path
+import io
+import numpy as np
+from wavefront_reader import read_objfile, read_wavefront, WavefrontWriter, Stats
+
+filepath = path.join(path.split(__file__)[0], '..', 'examples')
+fname = path.join(filepath, 'two_complete_meshes.obj')
+
+
+def test_read_stats_count_lines_bytes_and_arrays():
+    stats = Stats()
+    geoms = read_objfile(fname, stats=stats)
+    with open(fname) as f:
+        prefixes = [line.split(' ', 1)[0] for line in f if line.strip()]
+    for prefix in ['v', 'vt', 'vn', 'f', 'o']:
+        assert stats.lines[prefix] == prefixes.count(prefix)
+    assert stats.bytes['obj'] == path.getsize(fname)
+    assert stats.allocations['v'] == sum(geom['v'].nbytes for geom in geoms.values())
+    assert stats.allocations['pools'] > 0
+    assert set(['classify', 'coords', 'faces', 'build']) <= set(stats.timings)
+
+
+def test_read_wavefront_stats_include_materials():
+    stats = Stats()
+    read_wavefront(fname, stats=stats)
+    assert stats.bytes['mtl'] > 0
+    assert 'mtl' in stats.timings
+
+
+def test_dump_stats_and_callback():
+    events = []
+    stats = Stats(callback=lambda *event: events.append(event))
+    writer = WavefrontWriter.from_arrays('Tri', np.eye(3), np.ones((1, 3)))
+    f = io.StringIO()
+    writer.dump(f, stats=stats)
+    assert stats.bytes['written'] == len(f.getvalue())
+    assert stats.lines['v'] == 3 and stats.lines['f'] == 1
+    assert ('lines', 'f', 1) in events
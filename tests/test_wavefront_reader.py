@@ -31,3 +31,48 @@ def test_geoms_have_material_dict(fn):
         assert 'Kd' in geom['material']
 
 
+def write_two_library_mesh(tmpdir):
+    tmpdir.join('a.mtl').write('newmtl Red\nKd 1 0 0\nillum 2\n')
+    tmpdir.join('b.mtl').write('newmtl Blue\nKd 0 0 1\nillum 2\n')
+    fn = tmpdir.join('two_libs.obj')
+    fn.write('mtllib a.mtl\nmtllib b.mtl\n'
+             'o Left\nv 0 0 0\nv 1 0 0\nv 0 1 0\nusemtl Red\nf 1 2 3\n'
+             'o Right\nv 1 1 0\nusemtl Blue\nf 2 4 3\n')
+    return str(fn)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {'lazy': True}, {'workers': 2}])
+def test_materials_from_every_mtllib(tmpdir, kwargs):
+    geoms = read_wavefront(write_two_library_mesh(tmpdir), **kwargs)
+    assert geoms['Left']['material']['Kd'] == (1, 0, 0)
+    assert geoms['Right']['material']['Kd'] == (0, 0, 1)
+
+
+def test_obj_file_is_opened_once(tmpdir, monkeypatch):
+    import io
+    from wavefront_reader import reading
+    fname = write_two_library_mesh(tmpdir)
+    opened = []
+
+    def recording_open(fn, *args, **kwargs):
+        opened.append(fn)
+        return io.open(fn, *args, **kwargs)
+
+    monkeypatch.setattr(reading, 'open', recording_open, raising=False)
+    read_wavefront(fname)
+    assert opened.count(fname) == 1
+
+
+def test_submeshes_get_their_materials(tmpdir):
+    fname = write_two_library_mesh(tmpdir)
+    tmpdir.join('two_libs.obj').write(open(fname).read() + 'usemtl Red\nf 1 2 4\n')
+    right = read_wavefront(fname, submeshes=True)['Right']
+    assert [sub['material']['Kd'] for sub in right['submeshes']] == [(0, 0, 1), (1, 0, 0)]
+
+
+def test_read_wavefront_takes_path_objects():
+    import pathlib
+    fname = path.join(filepath, 'two_complete_meshes.obj')
+    geoms = read_wavefront(pathlib.Path(fname))
+    assert sorted(geoms) == sorted(read_wavefront(fname))
+    assert all('material' in geom for geom in geoms.values())
@@ -4,6 +4,7 @@ import unittest
 import os
 from uuid import uuid4
 from wavefront_reader import WavefrontWriter, read_objfile
+from wavefront_reader.writing import fan_triangulate
 import numpy as np
 
 
@@ -38,3 +39,54 @@ class TestWriter(unittest.TestCase):
         obj = geoms[self.objname]
         self.assertTrue(np.isclose(np.array(self.verts), np.array(obj['v'])).all())
         self.assertTrue(np.isclose(np.array(self.norms), np.array(obj['vn'])).all())
+
+
+def test_face_index_welds_vertices_within_tolerance():
+    from wavefront_reader.writing import face_index
+    verts = np.array([[[0., 0., 0.], [1., 0., 0.], [1., 1., 0.]],
+                      [[1e-9, 0., 0.], [1., 1., 1e-9], [0., 1., 0.]]])
+    new_verts, indices = face_index(verts)
+    assert np.array_equal(new_verts, [[0., 0., 0.], [1., 0., 0.], [1., 1., 0.], [0., 1., 0.]])
+    assert np.array_equal(indices, [[0, 1, 2], [0, 2, 3]])
+
+
+def test_face_index_merges_into_earliest_kept_vertex():
+    from wavefront_reader.writing import face_index
+    # The middle vertex is close to both neighbours, but the last one is only close to the middle one.
+    verts = np.array([[[0., 0., 0.], [0.6e-8, 0., 0.], [1.2e-8, 0., 0.]]])
+    new_verts, indices = face_index(verts)
+    assert np.array_equal(indices, [[0, 0, 1]])
+    assert len(new_verts) == 2
+
+
+def test_face_index_keeps_every_other_vertex_of_a_long_chain():
+    from wavefront_reader.writing import face_index
+    # Each vertex is only close to its neighbours, so the greedy rule alternates between keeping and merging.
+    verts = np.zeros((1, 2001, 3))
+    verts[0, :, 0] = np.arange(2001) * 0.9e-8
+    new_verts, indices = face_index(verts)
+    assert np.array_equal(new_verts, verts[0, ::2])
+    assert np.array_equal(indices[0], np.arange(2001) // 2)
+
+
+def test_precision_limits_written_decimals():
+    writer = WavefrontWriter.from_arrays('Triangle', [[0., 0., 0.], [0., 1. / 3, 1.], [1., 0., 0.]], [[0., 1., 0.]],
+                                         precision=3)
+    text = writer.dumps()
+    assert 'v 0.000 0.333 1.000\n' in text
+    assert 'f 1/1/1 2/1/1 3/1/1\n' in text
+
+
+def test_dump_matches_dumps(tmpdir):
+    verts = np.random.RandomState(0).rand(69999, 3)
+    writer = WavefrontWriter.from_arrays('Big', verts, verts[::3])
+    fname = str(tmpdir.join('big.obj'))
+    writer.dump(fname)
+    with open(fname) as f:
+        assert f.read() == writer.dumps()
+    assert np.allclose(read_objfile(fname)['Big']['v'], verts)
+
+
+def test_fan_triangulate_any_arity():
+    assert np.array_equal(fan_triangulate([[0, 1, 2, 3]]), [[0, 1, 2], [0, 2, 3]])
+    assert np.array_equal(fan_triangulate([[0, 1, 2], [3, 4, 5, 6, 7]]), [[0, 1, 2], [3, 4, 5], [3, 5, 6], [3, 6, 7]])
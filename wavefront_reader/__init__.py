@@ -1,8 +1,19 @@
 # -*- coding: utf-8 -*-
+import sys
 
 __author__ = """Nicholas A. Del Grosso"""
 __email__ = 'delgrosso@bio.lmu.de'
 __version__ = '0.1.0'
 
-from .reading import read_objfile, parse_mixed_delim_str, read_mtlfile, read_wavefront
+from .reading import (read_objfile, iter_objfile, parse_mixed_delim_str, read_mtlfile, read_wavefront,
+                      materials_to_array, MaterialCache, material_cache)
 from .writing import WavefrontWriter
+from .cache import WavefrontCache
+from .binary import BinaryWriter, read_binary, read_binary_bounds
+from .batch import read_wavefront_batch
+from .index import ObjIndex, LazyGeoms, read_object
+from .stats import Stats
+from .incremental import IncrementalReader
+from .bvh import BVH, add_bvh
+if sys.version_info >= (3, 5):
+    from .aio import read_objfile_async, read_mtlfile_async, read_wavefront_async
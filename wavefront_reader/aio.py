@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Asyncio versions of the readers, for use in event loops (Python 3.5+)."""
+import asyncio
+from os import path
+import numpy as np
+
+from .reading import _ObjParser, _attach_materials, _mtllib_paths, material_cache, read_mtlfile
+
+_OPTIONS = ('vertex_dtype', 'indexed', 'index_dtype', 'interleaved', 'submeshes', 'triangulate', 'normals', 'bounds',
+            'stats')
+
+
+def _check_options(func_name, kwargs):
+    """Raises TypeError for keyword arguments of read_objfile() that the asyncio versions don't take."""
+    unsupported = sorted(set(kwargs) - set(_OPTIONS))
+    if unsupported:
+        raise TypeError("{}() got unsupported keyword arguments: {} (it takes {})".format(
+            func_name, ', '.join(unsupported), ', '.join(_OPTIONS)))
+
+
+async def _limited(semaphore, coro):
+    """Awaits coro, holding the semaphore (if any) while it runs."""
+    try:
+        if semaphore is None:
+            return await coro
+        async with semaphore:
+            return await coro
+    finally:
+        coro.close()  # In case it was cancelled before it could start.
+
+
+async def _read_objfile(fname, executor, chunk_size, on_mtllib, vertex_dtype=np.float64, triangulate=False,
+                        stats=None, **options):
+    loop = asyncio.get_event_loop()
+    parser = _ObjParser(default_name=fname, dtype=vertex_dtype, triangulate=triangulate, on_mtllib=on_mtllib,
+                        stats=stats)
+    f = open(fname, 'rb')
+    reading = None
+    try:
+        tail = b''
+        reading = loop.run_in_executor(executor, f.read, chunk_size)
+        while True:
+            data = await reading
+            if not data:
+                break
+            if stats is not None:
+                stats.record('bytes', 'obj', len(data))
+            reading = loop.run_in_executor(executor, f.read, chunk_size)  # Read ahead while this chunk is parsed.
+            block = tail + data
+            cut = block.rfind(b'\n') + 1
+            block, tail = block[:cut], block[cut:]
+            if block:
+                await loop.run_in_executor(executor, parser.feed, block)
+        reading = None
+        if tail:
+            await loop.run_in_executor(executor, parser.feed, tail)
+
+        def build():
+            geoms = {obj['o']: obj for obj in parser.build(parser.pop_objects(final=True), **options)}
+            parser.record_pools()
+            return geoms
+        return await loop.run_in_executor(executor, build)
+    finally:
+        # Drop the partial pools and objects straight away if cancelled, rather than with the coroutine frame.
+        parser.pools.clear()
+        del parser.objects[:]
+        if reading is not None:
+            reading.cancel()
+        f.close()
+
+
+async def read_objfile_async(fname, executor=None, semaphore=None, chunk_size=1 << 22, **kwargs):
+    """Asyncio version of read_objfile(), taking its keyword arguments except workers, lazy and on_mtllib.
+
+    The file is read chunk_size bytes at a time and parsed, chunk by chunk, in executor (the event loop's default
+    executor if None), so the event loop is never blocked.  Pass the same asyncio.Semaphore as semaphore to many
+    loads to limit how many run at once.  If the load is cancelled, its partly-parsed data is released.
+    A Stats object passed as stats collects the parsing timings and counts, but not the time spent reading.
+    """
+    _check_options('read_objfile_async', kwargs)
+    return await _limited(semaphore, _read_objfile(fname, executor, chunk_size, None, **kwargs))
+
+
+async def read_mtlfile_async(fname, executor=None, semaphore=None, structured=False):
+    """Asyncio version of read_mtlfile(), which runs in executor (see read_objfile_async)."""
+    async def read():
+        return await asyncio.get_event_loop().run_in_executor(executor, read_mtlfile, fname, structured)
+    return await _limited(semaphore, read())
+
+
+async def _read_wavefront(fname_obj, executor, chunk_size, **kwargs):
+    loop = asyncio.get_event_loop()
+    mtllibs, loads = [], {}
+
+    def on_mtllib(value):  # Called from the executor; the loads are started back on the event loop.
+        mtllibs.append(value)
+        loop.call_soon_threadsafe(start_loads)
+
+    def start_loads():
+        for value in mtllibs:
+            for fname in _mtllib_paths(path.dirname(fname_obj), value):
+                if fname not in loads:
+                    loads[fname] = loop.run_in_executor(executor, material_cache.read_mtlfile, fname)
+
+    try:
+        geoms = await _read_objfile(fname_obj, executor, chunk_size, on_mtllib, **kwargs)
+        start_loads()
+        if loads:
+            materials = {}
+            for result in await asyncio.gather(*loads.values()):
+                materials.update(result)
+            _attach_materials(geoms, materials)
+        return geoms
+    finally:
+        for load in loads.values():
+            load.cancel()
+
+
+async def read_wavefront_async(fname_obj, executor=None, semaphore=None, chunk_size=1 << 22, **kwargs):
+    """Asyncio version of read_wavefront(), taking the keyword arguments of read_objfile_async() (so no cache).
+
+    Material libraries are loaded in executor as soon as the parser reaches their 'mtllib' line, while the
+    .obj file is still being read (see read_objfile_async).
+    """
+    _check_options('read_wavefront_async', kwargs)
+    return await _limited(semaphore, _read_wavefront(fname_obj, executor, chunk_size, **kwargs))
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import glob
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+from os import path
+from six import string_types
+
+from .reading import read_objfile, material_cache, _mtllib_paths, _attach_materials
+
+
+def _read_cached_mtlfile(fname):
+    return material_cache.read_mtlfile(fname)
+
+
+def _read_objfile_mtllibs(fname, **kwargs):
+    """Returns an .obj file's geoms, and the paths of the material libraries it names."""
+    mtllibs = []
+    geoms = read_objfile(fname, on_mtllib=mtllibs.append, **kwargs)
+    return geoms, [fname_mtl for value in mtllibs for fname_mtl in _mtllib_paths(path.dirname(fname), value)]
+
+
+def read_wavefront_batch(fnames, workers=4, processes=False, **kwargs):
+    """Loads many .obj files (a list of paths, or a glob pattern) concurrently, as read_wavefront() would.
+
+    Files are parsed in a pool of worker threads, or processes if processes=True, and each material library
+    is parsed only once however many .obj files share it.  Returns a {path: geoms} dict of the files that
+    loaded, and a {path: exception} dict of those that failed, so one bad file doesn't stop the rest.
+    Keyword arguments are passed on to read_objfile().
+    """
+    if isinstance(fnames, string_types):
+        fnames = sorted(glob.glob(fnames))
+
+    results, errors = {}, {}
+    pool = (multiprocessing.Pool if processes else ThreadPool)(workers)
+    try:
+        obj_jobs = [(fname, pool.apply_async(_read_objfile_mtllibs, (fname,), kwargs)) for fname in fnames]
+        loaded, mtl_jobs = [], {}
+        for fname, job in obj_jobs:
+            try:
+                geoms, fnames_mtl = job.get()
+            except Exception as err:
+                errors[fname] = err
+                continue
+            for fname_mtl in fnames_mtl:
+                if fname_mtl not in mtl_jobs:
+                    mtl_jobs[fname_mtl] = pool.apply_async(_read_cached_mtlfile, (fname_mtl,))
+            loaded.append((fname, geoms, fnames_mtl))
+
+        for fname, geoms, fnames_mtl in loaded:
+            try:
+                if fnames_mtl:
+                    materials = {}
+                    for fname_mtl in fnames_mtl:
+                        materials.update(mtl_jobs[fname_mtl].get())
+                    _attach_materials(geoms, materials)
+                results[fname] = geoms
+            except Exception as err:
+                errors[fname] = err
+    finally:
+        pool.close()
+        pool.join()
+
+    return results, errors
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import struct
+import numpy as np
+from six import iteritems, string_types
+
+from .reading import _attach_geom_materials, _index_dtype, _mesh_bounds, _weld_face_columns
+from .writing import face_index, fan_triangulate
+
+_MAGIC = b'WFRC'
+_MESH_MAGIC = b'WFRM'
+_VERSION = 1
+_ALIGN = 64
+_PREAMBLE = struct.Struct('<4sIQ')  # magic, version, header length
+
+
+def _interleaved_views(geom):
+    """Returns [key, start, stop] for each of a geom's v, vt and vn arrays that is a view of columns start:stop
+    of its 'interleaved' array."""
+    interleaved = geom.get('interleaved')
+    if not isinstance(interleaved, np.ndarray) or interleaved.ndim != 2:
+        return []
+    views = []
+    for key in ['v', 'vt', 'vn']:
+        view = geom.get(key)
+        if not isinstance(view, np.ndarray) or view.ndim != 2 or view.dtype != interleaved.dtype:
+            continue
+        offset = view.__array_interface__['data'][0] - interleaved.__array_interface__['data'][0]
+        start, remainder = divmod(offset, interleaved.itemsize)
+        if (not remainder and 0 <= start and start + view.shape[1] <= interleaved.shape[1] and
+                view.shape[0] == interleaved.shape[0] and view.strides == interleaved.strides):
+            views.append([key, start, start + view.shape[1]])
+    return views
+
+
+def _encode(value, arrays):
+    """Makes a geoms dict JSON-serializable, moving its numpy arrays into a list and leaving references to them.
+    Arrays that view columns of an 'interleaved' array are stored as their column range only."""
+    if isinstance(value, np.ndarray):
+        arrays.append(value)
+        return {'__array__': len(arrays) - 1}
+    elif isinstance(value, dict):
+        views = _interleaved_views(value)
+        if views:
+            viewed = set(key for key, _, _ in views)
+            return {'__dict__': [[key, _encode(val, arrays)] for key, val in iteritems(value) if key not in viewed],
+                    '__views__': views}
+        return {'__dict__': [[key, _encode(val, arrays)] for key, val in iteritems(value)]}
+    elif isinstance(value, (tuple, list)):
+        return [_encode(val, arrays) for val in value]
+    return value
+
+
+def _decode(value, arrays):
+    """Inverse of _encode(), with JSON lists turned back into tuples."""
+    if isinstance(value, dict):
+        if '__array__' in value:
+            return arrays[value['__array__']]
+        decoded = {key: _decode(val, arrays) for key, val in value['__dict__']}
+        for key, start, stop in value.get('__views__', ()):
+            decoded[key] = decoded['interleaved'][:, start:stop]
+        return decoded
+    elif isinstance(value, list):
+        return tuple(_decode(val, arrays) for val in value)
+    return value
+
+
+def _geom_bounds(geoms):
+    """Returns the {name: bounds dict} of the geoms read with bounds=True, to keep in a bundle's header."""
+    return {name: geom['bounds'] for name, geom in iteritems(geoms) if 'bounds' in geom}
+
+
+def _meta_bounds(meta):
+    """Returns the bounds kept in a bundle's header by _geom_bounds(), with JSON lists turned back into tuples."""
+    return {name: {key: tuple(val) if isinstance(val, list) else val for key, val in iteritems(bounds)}
+            for name, bounds in iteritems(meta.get('bounds', {}))}
+
+
+def _dump_bundle(f, meta, obj, magic=_MAGIC):
+    """Writes obj (nested dicts, tuples, scalars and arrays) to a memory-mappable binary file or file object.
+
+    The file is a fixed preamble, a JSON header describing obj and every array's dtype, shape and offset,
+    then the raw little-endian array buffers, each aligned to 64 bytes.
+    """
+    if not hasattr(f, 'write'):
+        with open(f, 'wb') as bf:
+            return _dump_bundle(bf, meta, obj, magic)
+
+    arrays = []
+    tree = _encode(obj, arrays)
+    arrays = [np.ascontiguousarray(arr) for arr in arrays]
+    layout, offset = [], 0
+    for arr in arrays:
+        layout.append({'dtype': arr.dtype.newbyteorder('<').str, 'shape': arr.shape, 'offset': offset})
+        offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({'meta': meta, 'tree': tree, 'arrays': layout}).encode('utf-8')
+    data_start = -(-(_PREAMBLE.size + len(header)) // _ALIGN) * _ALIGN
+
+    f.write(_PREAMBLE.pack(magic, _VERSION, len(header)))
+    f.write(header)
+    written = _PREAMBLE.size + len(header)
+    for arr, info in zip(arrays, layout):
+        f.write(b'\0' * (data_start + info['offset'] - written))  # Alignment padding.
+        f.write(arr.astype(info['dtype'], copy=False).tobytes())
+        written = data_start + info['offset'] + arr.nbytes
+    f.write(b'\0' * (data_start + offset - written))
+
+
+def _load_bundle(source, meta_only=False, magic=_MAGIC):
+    """Reads a file (or buffer) written by _dump_bundle(), returning (meta, obj) with the arrays memory-mapped
+    read-only (or viewing the buffer)."""
+    if isinstance(source, string_types):
+        with open(source, 'rb') as f:
+            preamble = f.read(_PREAMBLE.size)
+            if len(preamble) < _PREAMBLE.size:
+                raise ValueError("{} is not a wavefront_reader bundle.".format(source))
+            magic_read, version, header_len = _PREAMBLE.unpack(preamble)
+            header = f.read(header_len)
+    else:
+        source = memoryview(source)
+        magic_read, version, header_len = _PREAMBLE.unpack(bytes(source[:_PREAMBLE.size]))
+        header = bytes(source[_PREAMBLE.size:_PREAMBLE.size + header_len])
+    if magic_read != magic or version != _VERSION:
+        name = source if isinstance(source, string_types) else 'The buffer'
+        raise ValueError("{} is not a version {} wavefront_reader bundle.".format(name, _VERSION))
+    header = json.loads(header.decode('utf-8'))
+    if meta_only:
+        return header['meta'], None
+
+    data_start = -(-(_PREAMBLE.size + header_len) // _ALIGN) * _ALIGN
+    buf = source
+    if isinstance(source, string_types):
+        buf = np.memmap(source, dtype=np.uint8, mode='r') if header['arrays'] else None
+    arrays = []
+    for info in header['arrays']:
+        dtype, shape = np.dtype(info['dtype']), tuple(info['shape'])
+        count = int(np.prod(shape))
+        arrays.append(np.frombuffer(buf, dtype=dtype, count=count, offset=data_start + info['offset']).reshape(shape))
+    return header['meta'], _decode(header['tree'], arrays)
+
+
+class BinaryWriter(object):
+    """Holds meshes and their materials to save as a compact binary file, which read_binary() loads zero-copy.
+
+    The file has a versioned header (the object and material tables, with each array's dtype, shape and offset)
+    followed by the raw little-endian v, vt, vn and indices buffers of every object (or, for objects read with
+    interleaved=True, their interleaved buffer, which v, vt and vn are views of again when read back).
+    The objects' 'bounds' (see read_objfile) are also kept in the header, for read_binary_bounds().
+    """
+
+    def __init__(self, geoms=None, materials=None):
+        """Takes a geoms dict (as returned by read_wavefront) and an optional {name: material dict} table.
+        Materials attached to the geoms under 'material' are added to the table."""
+        self.geoms = {}
+        self.materials = dict(materials or {})
+        for name, geom in iteritems(geoms or {}):
+            geom = dict(geom)
+            if 'material' in geom:
+                self.materials.setdefault(geom['usemtl'], geom.pop('material'))
+            if 'submeshes' in geom:
+                geom['submeshes'] = tuple({key: val for key, val in iteritems(submesh) if key != 'material'}
+                                          for submesh in geom['submeshes'])
+            self.geoms[name] = geom
+
+    @classmethod
+    def from_arrays(cls, name, verts, normals, n_verts=3, materials=None):
+        """Takes per-corner Nx3 verts of faces with n_verts corners each, and one normal per face."""
+        verts = np.asarray(verts).reshape(-1, 3)
+        normals = np.repeat(np.asarray(normals).reshape(-1, 3), n_verts, axis=0)
+        bounds = _mesh_bounds(verts.reshape(-1, n_verts, 3))
+        bounds['n_vertices'] = len(verts)
+        geom = {'o': name, 'v': verts, 'vt': tuple(), 'vn': normals, 'arity': n_verts, 'bounds': bounds}
+        return cls({name: geom}, materials)
+
+    @classmethod
+    def from_indexed_arrays(cls, name, verts, normals, materials=None):
+        """Takes MxNx3 verts and Mx3 normals, and stores them welded and triangulated, with indices."""
+        new_verts, face_indices = face_index(verts)
+        tris_per_face = face_indices.shape[1] - 2
+        triangles = fan_triangulate(face_indices)
+        normal_indices = np.repeat(np.arange(len(triangles)) // tris_per_face, 3).reshape(-1, 3)
+        (vert_idx, _, normal_idx), inverse = _weld_face_columns((triangles + 1, None, normal_indices + 1))
+        geom = {'o': name, 'v': new_verts[vert_idx], 'vt': tuple(), 'vn': np.asarray(normals)[normal_idx],
+                'indices': inverse.reshape(-1, 3).astype(_index_dtype(len(vert_idx))), 'arity': 3,
+                'bounds': _mesh_bounds(np.asarray(verts, dtype=float))}
+        geom['bounds']['n_vertices'] = len(vert_idx)
+        return cls({name: geom}, materials)
+
+    def dump(self, f):
+        """Write the binary mesh file.  Takes a binary File object or filename."""
+        _dump_bundle(f, {'format': 'wavefront_reader mesh', 'bounds': _geom_bounds(self.geoms)},
+                     {'geoms': self.geoms, 'materials': self.materials}, magic=_MESH_MAGIC)
+
+    def dumps(self):
+        """Return the binary mesh file as bytes."""
+        f = io.BytesIO()
+        self.dump(f)
+        return f.getvalue()
+
+
+def read_binary(source):
+    """Loads a file written by BinaryWriter, returning a geoms dict shaped like read_wavefront()'s.
+
+    The source is a filename, whose arrays are returned as read-only memory maps, or a bytes-like buffer, which
+    the arrays view directly; nothing is copied either way.  Each geom's material is attached under 'material'.
+    """
+    _, tree = _load_bundle(source, magic=_MESH_MAGIC)
+    geoms, materials = tree['geoms'], tree['materials']
+    for geom in geoms.values():
+        if geom.get('usemtl') in materials:
+            _attach_geom_materials(geom, materials)
+    return geoms
+
+
+def read_binary_bounds(source):
+    """Returns the {name: bounds dict} of the objects in a file written by BinaryWriter, reading only its header."""
+    meta, _ = _load_bundle(source, meta_only=True, magic=_MESH_MAGIC)
+    return _meta_bounds(meta)
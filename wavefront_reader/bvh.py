@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from .writing import fan_triangulate
+
+_ARRAY_NAMES = ('lo', 'hi', 'child', 'start', 'count', 'order')
+
+
+def _segment_positions(starts, counts):
+    """Returns the concatenated ranges [start, start + count) of each segment."""
+    ends = np.cumsum(counts)
+    return np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - ends + counts, counts)
+
+
+def _dot(a, b):
+    return (a * b).sum(axis=-1)
+
+
+def _ray_triangle_distances(origins, directions, triangles):
+    """Returns the distance along each ray to its triangle (Moller-Trumbore), or inf where it misses."""
+    a, ab, ac = triangles[:, 0], triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]
+    pvec = np.cross(directions, ac)
+    det = _dot(ab, pvec)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_det = 1. / det
+        tvec = origins - a
+        u = _dot(tvec, pvec) * inv_det
+        qvec = np.cross(tvec, ab)
+        v = _dot(directions, qvec) * inv_det
+        t = _dot(ac, qvec) * inv_det
+        hit = (det != 0) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+    return np.where(hit, t, np.inf)
+
+
+def _closest_triangle_points(points, triangles):
+    """Returns the point of each triangle closest to its point, testing the Voronoi regions of its corners and
+    edges (as in Ericson's Real-Time Collision Detection)."""
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    ab, ac, ap, bp, cp = b - a, c - a, points - a, points - b, points - c
+    d1, d2, d3, d4, d5, d6 = _dot(ab, ap), _dot(ac, ap), _dot(ab, bp), _dot(ac, bp), _dot(ab, cp), _dot(ac, cp)
+    va, vb, vc = d3 * d6 - d5 * d4, d5 * d2 - d1 * d6, d1 * d4 - d3 * d2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denom = va + vb + vc
+        closest = a + ab * (vb / denom)[:, None] + ac * (vc / denom)[:, None]  # Inside the face.
+        # The other regions, from last to first checked, so that the first one that applies is kept.
+        regions = [(va <= 0) & (d4 >= d3) & (d5 >= d6), b + (c - b) * ((d4 - d3) / (d4 - d3 + d5 - d6))[:, None],
+                   (vb <= 0) & (d2 >= 0) & (d6 <= 0), a + ac * (d2 / (d2 - d6))[:, None],
+                   (d6 >= 0) & (d5 <= d6), c,
+                   (vc <= 0) & (d1 >= 0) & (d3 <= 0), a + ab * (d1 / (d1 - d3))[:, None],
+                   (d3 >= 0) & (d4 <= d3), b,
+                   (d1 <= 0) & (d2 <= 0), a]
+        for inside, region_closest in zip(regions[::2], regions[1::2]):
+            closest = np.where(inside[:, None], region_closest, closest)
+    return closest
+
+
+class BVH(object):
+    """A bounding volume hierarchy over a mesh's triangles, for batched ray picking and nearest-point queries.
+
+    The tree is kept in flat arrays, one row per node in breadth-first order: its box ('lo', 'hi'), the index of
+    its first child ('child', the second one follows it; -1 for leaves), and the range of 'order' (the triangle
+    indices, sorted by node) it covers ('start', 'count').  It is built a level at a time: the triangles of every
+    node of a level are sorted together along the longest axis of their node's centroid bounds, and each node
+    split at its median, until nodes have at most leaf_size triangles.
+    """
+
+    def __init__(self, triangles, leaf_size=4, arrays=None):
+        """Builds the tree over an Nx3x3 array of triangle corners (or takes its arrays, see from_arrays)."""
+        self.triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+        if not len(self.triangles):
+            raise ValueError("A BVH needs at least one triangle.")
+        if arrays is None:
+            arrays = self._build(self.triangles, leaf_size)
+        for name in _ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self._leaf_triangles = self.triangles[self.order]  # Reordered so each leaf's triangles are contiguous.
+
+    @staticmethod
+    def _build(triangles, leaf_size):
+        # The centroids are kept in tree order, so each level only moves them within their nodes' ranges.
+        order, centroids = np.arange(len(triangles)), triangles.mean(axis=1)
+        starts, counts = np.zeros(1, dtype=np.int64), np.array([len(triangles)])
+        levels, n_nodes = [], 0
+        while len(starts):
+            split = counts > leaf_size
+            child = np.full(len(starts), -1, dtype=np.int64)
+            child[split] = n_nodes + len(starts) + 2 * np.arange(split.sum())
+            levels.append((child, starts, counts))
+            n_nodes += len(starts)
+
+            starts, counts = starts[split], counts[split]
+            if not len(starts):
+                break
+            positions = _segment_positions(starts, counts)
+            cents = centroids[positions]
+            seg_ids = np.repeat(np.arange(len(starts)), counts)
+            seg_bounds = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            cent_lo, cent_hi = np.minimum.reduceat(cents, seg_bounds), np.maximum.reduceat(cents, seg_bounds)
+            axes = np.argmax(cent_hi - cent_lo, axis=1)
+            extents = (cent_hi - cent_lo)[np.arange(len(axes)), axes]
+            axes, offsets, extents = axes[seg_ids], cent_lo[seg_ids, axes[seg_ids]], extents[seg_ids]
+            # One sort for the whole level: the segment number plus the centroid's position in [0, 0.5] along its axis.
+            keys = (cents[np.arange(len(cents)), axes] - offsets) / np.where(extents > 0, extents, 1)
+            sort = np.argsort(seg_ids + keys / 2)
+            order[positions], centroids[positions] = order[positions][sort], cents[sort]
+            halves = counts // 2
+            starts = np.stack([starts, starts + halves], axis=1).ravel()
+            counts = np.stack([halves, counts - halves], axis=1).ravel()
+        child, starts, counts = (np.concatenate(arrays) for arrays in zip(*levels))
+
+        # Boxes: those of the leaves (which tile the sorted triangles) first, then of their parents, level by level.
+        lo, hi = np.empty((n_nodes, 3)), np.empty((n_nodes, 3))
+        leaves = np.flatnonzero(child < 0)
+        leaves = leaves[np.argsort(starts[leaves])]
+        sorted_tris = triangles[order]
+        lo[leaves] = np.minimum.reduceat(sorted_tris.min(axis=1), starts[leaves])
+        hi[leaves] = np.maximum.reduceat(sorted_tris.max(axis=1), starts[leaves])
+        level_end = n_nodes
+        for level_child, _, _ in levels[::-1]:
+            nodes = np.arange(level_end - len(level_child), level_end)[level_child >= 0]
+            lo[nodes] = np.minimum(lo[child[nodes]], lo[child[nodes] + 1])
+            hi[nodes] = np.maximum(hi[child[nodes]], hi[child[nodes] + 1])
+            level_end -= len(level_child)
+        return {'lo': lo, 'hi': hi, 'child': child, 'start': starts, 'count': counts, 'order': order}
+
+    @classmethod
+    def from_arrays(cls, triangles, arrays):
+        """Returns the tree stored in arrays (as given by its arrays attribute) over triangles, without rebuilding."""
+        return cls(triangles, arrays=arrays)
+
+    @classmethod
+    def from_geom(cls, geom, leaf_size=4, arity=None):
+        """Returns the tree over the triangles of a geom dict (as returned by read_objfile), reusing the one stored
+        under its 'bvh' key if there is one.  Polygons are fan-triangulated, so triangle indices count the
+        triangles of each face in turn; geoms without 'indices' need their faces' vertex count as arity, unless
+        add_bvh() recorded it."""
+        triangles = _geom_triangles(geom, arity)
+        if 'bvh' in geom:
+            return cls.from_arrays(triangles, geom['bvh'])
+        return cls(triangles, leaf_size=leaf_size)
+
+    @property
+    def arrays(self):
+        """The {name: array} dict of the tree's arrays, which can be saved with the mesh (see add_bvh)."""
+        return {name: getattr(self, name) for name in _ARRAY_NAMES}
+
+    def _leaf_pairs(self, queries, nodes):
+        """Expands (query, leaf node) pairs into (query, position in order) pairs."""
+        counts = self.count[nodes]
+        return np.repeat(queries, counts), _segment_positions(self.start[nodes], counts)
+
+    def intersect(self, origins, directions):
+        """Casts Nx3 rays, returning the distance (in units of direction length) to the first triangle each hits,
+        and that triangle's index, or inf and -1 for rays that hit nothing."""
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+        best_t, best_tri = np.full(len(origins), np.inf), np.full(len(origins), -1, dtype=np.int64)
+        with np.errstate(divide='ignore'):
+            inv_dirs = 1. / directions
+        rays, nodes = np.arange(len(origins)), np.zeros(len(origins), dtype=np.int64)
+        while len(rays):
+            with np.errstate(invalid='ignore'):
+                t1 = (self.lo[nodes] - origins[rays]) * inv_dirs[rays]
+                t2 = (self.hi[nodes] - origins[rays]) * inv_dirs[rays]
+            # fmin/fmax skip the NaNs of rays parallel to, and starting on, a box's face.
+            near = np.maximum(np.fmax.reduce(np.fmin(t1, t2), axis=1), 0)
+            far = np.fmin.reduce(np.fmax(t1, t2), axis=1)
+            keep = (near <= far) & (near <= best_t[rays])
+            rays, nodes = rays[keep], nodes[keep]
+
+            leaf = self.child[nodes] < 0
+            tri_rays, positions = self._leaf_pairs(rays[leaf], nodes[leaf])
+            t = _ray_triangle_distances(origins[tri_rays], directions[tri_rays], self._leaf_triangles[positions])
+            np.minimum.at(best_t, tri_rays, t)
+            won = (t < np.inf) & (t == best_t[tri_rays])
+            best_tri[tri_rays[won]] = self.order[positions[won]]
+
+            rays, children = rays[~leaf], self.child[nodes[~leaf]]
+            rays, nodes = np.concatenate([rays, rays]), np.concatenate([children, children + 1])
+        return best_t, best_tri
+
+    def _box_distances2(self, points, nodes):
+        gaps = np.maximum(np.maximum(self.lo[nodes] - points, points - self.hi[nodes]), 0)
+        return (gaps ** 2).sum(axis=1)
+
+    def nearest(self, points):
+        """Returns the distance from each of Nx3 points to the closest triangle, that triangle's index, and the
+        closest point on it."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        best_d2, best_tri = np.full(len(points), np.inf), np.full(len(points), -1, dtype=np.int64)
+        best_points = np.zeros_like(points)
+
+        def visit_leaves(queries, leaves):
+            tri_points, positions = self._leaf_pairs(queries, leaves)
+            closest = _closest_triangle_points(points[tri_points], self._leaf_triangles[positions])
+            d2 = ((closest - points[tri_points]) ** 2).sum(axis=1)
+            np.minimum.at(best_d2, tri_points, d2)
+            won = d2 == best_d2[tri_points]
+            best_tri[tri_points[won]] = self.order[positions[won]]
+            best_points[tri_points[won]] = closest[won]
+
+        # Descending first to the nearest-looking leaf gives each point a distance bound to prune the search with.
+        nodes = np.zeros(len(points), dtype=np.int64)
+        while len(points) and np.any(self.child[nodes] >= 0):
+            inner = self.child[nodes] >= 0
+            left = self.child[nodes[inner]]
+            right_closer = self._box_distances2(points[inner], left + 1) < self._box_distances2(points[inner], left)
+            nodes[inner] = left + right_closer
+        visit_leaves(np.arange(len(points)), nodes)
+
+        queries, nodes = np.arange(len(points)), np.zeros(len(points), dtype=np.int64)
+        while len(queries):
+            keep = self._box_distances2(points[queries], nodes) < best_d2[queries]
+            queries, nodes = queries[keep], nodes[keep]
+            leaf = self.child[nodes] < 0
+            visit_leaves(queries[leaf], nodes[leaf])
+            queries, children = queries[~leaf], self.child[nodes[~leaf]]
+            queries, nodes = np.concatenate([queries, queries]), np.concatenate([children, children + 1])
+        return np.sqrt(best_d2), best_tri, best_points
+
+
+def _geom_triangles(geom, arity=None):
+    """Returns the Nx3x3 triangle corners of a geom dict, fan-triangulating its faces.  Without 'indices', the
+    faces' vertex count is arity, or the geom's 'arity'."""
+    verts = np.asarray(geom['v'])
+    if 'indices' in geom:
+        return verts[fan_triangulate(geom['indices'])]
+    arity = arity or geom.get('arity')
+    if arity is None:
+        raise ValueError("The faces of geom {!r} have an unknown vertex count; pass their arity (e.g. 3 for "
+                         "triangulate=True), or read them with indexed=True.".format(geom.get('o')))
+    return verts[fan_triangulate(np.arange(len(verts)).reshape(-1, arity))]
+
+
+def add_bvh(geoms, leaf_size=4, arity=None):
+    """Builds a BVH over each geom's triangles and stores its arrays under the geom's 'bvh' key, so that it is
+    saved along with the mesh by BinaryWriter, and BVH.from_geom() reuses it.
+    Geoms without 'indices' need the vertex count of their faces as arity, which is then kept under 'arity'.
+    Returns the geoms dict."""
+    for geom in geoms.values():
+        if len(geom['v']):
+            geom['bvh'] = BVH(_geom_triangles(geom, arity), leaf_size=leaf_size).arrays
+            if arity and 'indices' not in geom:
+                geom['arity'] = arity
+    return geoms
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+from os import path
+from six import iteritems
+
+from .binary import _dump_bundle, _geom_bounds, _load_bundle, _meta_bounds
+from .reading import _read_wavefront
+from .stats import _timer
+
+
+def _file_hash(fname, block_size=1 << 20):
+    """Returns the sha1 hex digest of a file's contents."""
+    digest = hashlib.sha1()
+    with open(fname, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_info(fname):
+    """Returns the identifying (path, mtime, size, content hash) record of a source file."""
+    stat = os.stat(fname)
+    return {'path': path.abspath(fname), 'mtime': stat.st_mtime, 'size': stat.st_size, 'hash': _file_hash(fname)}
+
+
+class WavefrontCache(object):
+    """A size-bounded directory of memory-mappable copies of parsed wavefront files.
+
+    Entries are keyed on the .obj path and read options, and are only used while every source file (the .obj and
+    its .mtl files) still has the recorded mtime and size; when those changed, the content hash decides.  Loaded arrays
+    are read-only memory maps.  Once the directory grows beyond max_size bytes, the least-recently-used entries
+    are removed.
+    """
+
+    suffix = '.wfc'
+
+    def __init__(self, directory=None, max_size=1 << 30, check_hash=False):
+        if directory is None:
+            directory = os.environ.get('WAVEFRONT_READER_CACHE',
+                                       path.join(path.expanduser('~'), '.cache', 'wavefront_reader'))
+        self.directory = directory
+        self.max_size = max_size
+        self.check_hash = check_hash
+        if not path.isdir(directory):
+            os.makedirs(directory)
+
+    def entry_path(self, fname, **options):
+        """Returns the cache file path used for a source file read with the given options."""
+        key = json.dumps([path.abspath(fname), sorted(iteritems(options))], default=str)
+        return path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + self.suffix)
+
+    def _is_fresh(self, sources):
+        """Returns whether the source files are unchanged, updating the recorded mtime of those whose content hash
+        was checked."""
+        for info in sources:
+            try:
+                stat = os.stat(info['path'])
+            except OSError:
+                return False
+            if stat.st_size != info['size']:
+                return False
+            if self.check_hash or stat.st_mtime != info['mtime']:
+                if _file_hash(info['path']) != info['hash']:
+                    return False
+                info['mtime'] = stat.st_mtime
+        return True
+
+    def _write_entry(self, entry, meta, result):
+        """Writes an entry through a temporary file, so readers never see it half-written."""
+        tmp = entry + '.{}.tmp'.format(os.getpid())
+        try:
+            _dump_bundle(tmp, meta, result)
+            os.rename(tmp, entry)
+        except BaseException:
+            if path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def get(self, fname, **options):
+        """Returns the cached result for fname and options, or None if there is no valid entry."""
+        entry = self.entry_path(fname, **options)
+        try:
+            meta, _ = _load_bundle(entry, meta_only=True)
+        except (IOError, OSError, ValueError):
+            return None
+        mtimes = [info['mtime'] for info in meta['sources']]
+        if not self._is_fresh(meta['sources']):
+            return None
+        result = _load_bundle(entry)[1]
+        if mtimes != [info['mtime'] for info in meta['sources']]:
+            # Touched but unchanged sources: record their new mtimes, so they aren't hashed again on every load.
+            try:
+                self._write_entry(entry, meta, result)
+            except (IOError, OSError):
+                pass
+        os.utime(entry, None)  # Mark as recently used.
+        return result
+
+    def get_bounds(self, fname, **options):
+        """Returns the {name: bounds dict} of the cached result for fname and options (read with bounds=True),
+        reading only the entry's header, or None if there is no valid entry."""
+        try:
+            meta, _ = _load_bundle(self.entry_path(fname, **options), meta_only=True)
+        except (IOError, OSError, ValueError):
+            return None
+        return _meta_bounds(meta) if self._is_fresh(meta['sources']) else None
+
+    def put(self, fname, result, sources, **options):
+        """Stores a result computed from the given source files, then evicts entries beyond max_size."""
+        meta = {'sources': [_source_info(source) for source in sources], 'bounds': _geom_bounds(result)}
+        self._write_entry(self.entry_path(fname, **options), meta, result)
+        self.evict()
+
+    def evict(self):
+        """Deletes least-recently-used entries until the cache fits in max_size bytes."""
+        entries = [path.join(self.directory, name) for name in os.listdir(self.directory)
+                   if name.endswith(self.suffix)]
+        entries = sorted((os.stat(entry).st_mtime, os.stat(entry).st_size, entry) for entry in entries)
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_size:
+                break
+            os.remove(entry)
+            total -= size
+
+    def clear(self):
+        """Deletes every cache entry."""
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix) or name.endswith('.tmp'):
+                os.remove(path.join(self.directory, name))
+
+    def read_wavefront(self, fname_obj, stats=None, **options):
+        """Cached version of read_wavefront().  Lazy reads (lazy=True) bypass the cache, as their objects are only
+        parsed when looked up."""
+        if options.get('lazy'):
+            return _read_wavefront(fname_obj, stats=stats, **options)[0]
+        with _timer(stats, 'cache_load'):
+            geoms = self.get(fname_obj, **options)
+        if geoms is None:
+            geoms, fnames_mtl = _read_wavefront(fname_obj, stats=stats, **options)
+            self.put(fname_obj, geoms, [fname_obj] + fnames_mtl, **options)
+        return geoms
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import os
+import zlib
+import numpy as np
+
+from .reading import _ObjParser, _Pool, _iter_line_windows, _mmap_file
+
+_GROWING_OPTIONS = ('indexed', 'interleaved', 'submeshes', 'normals', 'bounds')
+
+
+class _GrowingObject(object):
+    """The expanded v, vt and vn arrays of the object still being written, extended as its face blocks arrive."""
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.n_blocks = 0
+        self.arity = None
+        self.pools = {}
+
+
+class IncrementalReader(object):
+    """Reads an .obj file that keeps growing, parsing only the bytes appended since the last refresh().
+
+    The reader keeps the parser state between refreshes: the byte offset reached, the vertex pools (which grow by
+    amortized doubling), and the object still being written.  Finished objects are built once and kept.  With the
+    default (expanded) layout, the open object's arrays also grow by amortized doubling, with only its new faces
+    built on each refresh; with indexed, interleaved, submeshes, normals or bounds, it is rebuilt on each refresh.
+    If the part of the file already read has changed (the file was replaced, shrank, or its size or mtime changed
+    and the checksum of the part read differs), everything is parsed again from the start.
+    A last line without its newline is left for the next refresh, as it may still be being written.
+    Keyword arguments are the options of read_objfile() (vertex_dtype, indexed, index_dtype, interleaved,
+    submeshes, triangulate, normals, bounds).
+    """
+
+    def __init__(self, fname, vertex_dtype=np.float64, triangulate=False, chunk_size=1 << 24, **options):
+        self.fname = fname
+        self.vertex_dtype = vertex_dtype
+        self.triangulate = triangulate
+        self.chunk_size = chunk_size
+        self.options = options
+        self.n_full_parses = 0
+        self._grows = not any(options.get(name) for name in _GROWING_OPTIONS)
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self._parser = _ObjParser(default_name=self.fname, dtype=self.vertex_dtype, triangulate=self.triangulate)
+        self._geoms = {}
+        self._growing = None
+        self._stat = None
+        self._crc = 0
+
+    def _prefix_changed(self, stat, buf):
+        if self._stat is None:
+            return False
+        inode, size, mtime = self._stat
+        if stat.st_ino != inode or len(buf) < self.offset:
+            return True
+        if (stat.st_size, getattr(stat, 'st_mtime_ns', stat.st_mtime)) == (size, mtime):
+            return False
+        return zlib.crc32(memoryview(buf)[:self.offset]) != self._crc
+
+    def _build(self, obj):
+        """Builds an object, extending the growing arrays of the open one with its new face blocks only."""
+        parser = self._parser
+        if not self._grows:
+            return next(parser.build([obj], **self.options))
+        growing = self._growing
+        if growing is None or growing.obj is not obj:
+            growing = self._growing = _GrowingObject(obj)
+        if len(obj['f']) > growing.n_blocks:
+            part = next(parser.build([dict(obj, f=obj['f'][growing.n_blocks:], _groups=[])], **self.options))
+            names = set(name for name in ['v', 'vt', 'vn'] if len(part[name]))
+            arity = obj['f'][growing.n_blocks][0].shape[1]  # The new blocks share it, or the build above failed.
+            if growing.n_blocks and (arity != growing.arity or names != set(growing.pools)):
+                self._growing = None
+                return next(parser.build([obj], **self.options))  # Inconsistent faces: fails like read_objfile.
+            growing.arity = arity
+            for name in names:
+                growing.pools.setdefault(name, _Pool()).append(part[name])
+            growing.n_blocks = len(obj['f'])
+
+        geom = {key: value for key, value in obj.items() if key not in ('f', '_groups')}
+        for name in ['v', 'vt', 'vn']:
+            geom[name] = growing.pools[name].array if name in growing.pools else tuple()
+        return geom
+
+    def refresh(self):
+        """Parses whatever was appended to the file since the last call, and returns the geoms dict (as
+        read_objfile() would return for the file up to its last complete line)."""
+        stat = os.stat(self.fname)
+        buf = _mmap_file(self.fname)
+        if self._prefix_changed(stat, buf):
+            self._reset()
+
+        end = buf.rfind(b'\n', self.offset) + 1 if len(buf) > self.offset else 0
+        if end > self.offset:
+            if self.offset == 0:
+                self.n_full_parses += 1
+            parser = self._parser
+            for window in _iter_line_windows(buf, self.chunk_size, self.offset, end):
+                parser.feed(window)
+            for obj in parser.pop_objects():
+                if obj is not parser.implicit or obj['f']:
+                    geom = self._build(obj)
+                    for name in ['v', 'vt', 'vn']:  # Drops the room left for growth.
+                        if isinstance(geom[name], np.ndarray) and geom[name].base is not None:
+                            geom[name] = geom[name].copy()
+                    self._geoms[obj['o']] = geom
+            self._crc = zlib.crc32(memoryview(buf)[self.offset:end], self._crc)
+            self.offset = end
+        self._stat = stat.st_ino, stat.st_size, getattr(stat, 'st_mtime_ns', stat.st_mtime)
+
+        geoms = dict(self._geoms)
+        for obj in self._parser.objects:
+            if obj is not self._parser.implicit or obj['f']:
+                geoms[obj['o']] = self._build(obj)
+        return geoms
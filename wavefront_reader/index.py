@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+import os
+import numpy as np
+from six import iteritems, string_types
+
+from .binary import _dump_bundle, _load_bundle
+from .reading import (_ObjParser, _build_object, _classify_lines, _iter_line_windows, _iter_runs, _mmap_file,
+                      _parse_coords, _attach_geom_materials, _fspath, _POOL_PREFIXES, _F)
+
+
+class ObjIndex(object):
+    """The layout of an .obj file: where each object and each run of vertex data lines sits, in bytes.
+
+    objects maps object names to dicts with their 'start' and 'end' byte offsets, their face count 'n_faces', and
+    'pool_offsets', the number of 'v', 'vt' and 'vn' lines before the object.  runs maps 'v', 'vt' and 'vn' to
+    (n_runs x 4) arrays of [first vertex index, line count, start byte, end byte].  An index built from a file
+    also records the file's path, mtime and size in source, to tell whether it still matches the file.  mtllibs
+    lists the values of the file's 'mtllib' lines.
+    """
+
+    suffix = '.wfi'
+
+    def __init__(self, objects, runs, source=None, mtllibs=()):
+        self.objects = objects
+        self.runs = runs
+        self.source = source
+        self.mtllibs = list(mtllibs)
+
+    @classmethod
+    def build(cls, fname, chunk_size=1 << 24):
+        """Scans an .obj file and returns its index."""
+        fname = _fspath(fname)
+        stat = os.stat(fname)
+        index = cls.scan(_mmap_file(fname), fname, chunk_size)
+        index.source = {'path': fname, 'mtime': stat.st_mtime, 'size': stat.st_size}
+        return index
+
+    def is_current(self, fname=None):
+        """Checks that the indexed file (or fname) still has the mtime and size it had when it was indexed."""
+        try:
+            stat = os.stat(_fspath(fname) or self.source['path'])
+        except (OSError, TypeError):
+            return False
+        return stat.st_mtime == self.source['mtime'] and stat.st_size == self.source['size']
+
+    def save(self, fname=None):
+        """Writes the index to a sidecar file, by default next to the indexed file."""
+        fname = _fspath(fname) or self.source['path'] + self.suffix
+        _dump_bundle(fname, {'source': self.source},
+                     {'objects': self.objects, 'runs': self.runs, 'mtllibs': self.mtllibs})
+        return fname
+
+    @classmethod
+    def load(cls, fname):
+        """Reads an index from a sidecar file written by save()."""
+        meta, tree = _load_bundle(_fspath(fname))
+        return cls(tree['objects'], tree['runs'], source=meta['source'], mtllibs=tree.get('mtllibs', ()))
+
+    @classmethod
+    def scan(cls, buf, default_name=None, chunk_size=1 << 24):
+        """Builds the index of a buffer by classifying its lines, without converting any numbers."""
+        records, mtllibs, counts = [], [], {'v': 0, 'vt': 0, 'vn': 0}
+        runs = {name: [] for name in counts}
+
+        def new_record(name, start, implicit=False):
+            records.append({'o': name, 'start': start, 'n_faces': 0, 'pool_offsets': dict(counts),
+                            'implicit': implicit})
+
+        offset = 0
+        for window in _iter_line_windows(buf, chunk_size):
+            starts, ends, kinds = _classify_lines(window)
+            for kind, first, last in _iter_runs(kinds):
+                if kind in _POOL_PREFIXES:
+                    if not records:
+                        new_record(default_name, 0, implicit=True)
+                    name = _POOL_PREFIXES[kind].decode()
+                    start, end = offset + int(starts[first]), offset + int(ends[last - 1])
+                    runs[name].append((counts[name], last - first, start, end))
+                    counts[name] += last - first
+                elif kind == _F:
+                    if records:
+                        records[-1]['n_faces'] += last - first
+                else:
+                    for idx in range(first, last):
+                        split_line = bytes(window[starts[idx]:ends[idx]]).decode('utf-8', 'replace').strip()
+                        split_line = split_line.split(' ', 1)
+                        if len(split_line) < 2:
+                            continue
+                        prefix = split_line[0]
+                        if prefix == 'o':
+                            new_record(split_line[1], offset + int(starts[idx]))
+                        elif prefix == 'mtllib':
+                            mtllibs.append(split_line[1])
+                        elif prefix in counts:
+                            # Vertex data with leading whitespace, which the parser handles line by line.
+                            if not records:
+                                new_record(default_name, 0, implicit=True)
+                            runs[prefix].append((counts[prefix], 1, offset + int(starts[idx]), offset + int(ends[idx])))
+                            counts[prefix] += 1
+                        elif prefix == 'f' and records:
+                            records[-1]['n_faces'] += 1
+            offset += len(window)
+
+        objects = {}
+        for record, next_record in zip(records, records[1:] + [{'start': offset}]):
+            record['end'] = next_record['start']
+            if record.pop('implicit') and not record['n_faces']:
+                continue  # Shared vertex pools listed before the first 'o' statement.
+            objects[record.pop('o')] = record
+        runs = {name: np.array(value, dtype=np.int64).reshape(-1, 4) for name, value in iteritems(runs)}
+        return cls(objects, runs, mtllibs=mtllibs)
+
+
+class LazyGeoms(Mapping):
+    """A read-only geoms dict (as returned by read_objfile) that only parses an object when it is first accessed.
+
+    Looking up an object parses its own lines, plus the runs of vertex data lines that its faces refer to; both the
+    finished objects and the converted vertex runs are cached.
+    """
+
+    def __init__(self, source, index=None, vertex_dtype=np.float64, chunk_size=1 << 24, triangulate=False,
+                 **options):
+        source = _fspath(source)
+        default_name = source if isinstance(source, string_types) else None
+        self._buf = _mmap_file(source) if isinstance(source, string_types) else source
+        self.index = index or ObjIndex.scan(self._buf, default_name, chunk_size)
+        self.default_name = default_name
+        self.vertex_dtype = vertex_dtype
+        self.triangulate = triangulate
+        self.chunk_size = chunk_size
+        self.options = options
+        self.materials = None
+        self._geoms = {}
+        self._runs = {}
+
+    def __len__(self):
+        return len(self.index.objects)
+
+    def __iter__(self):
+        return iter(self.index.objects)
+
+    def __contains__(self, name):
+        return name in self.index.objects
+
+    def __getitem__(self, name):
+        if name not in self._geoms:
+            self._geoms[name] = self._load(name)
+        return self._geoms[name]
+
+    def _run(self, name, run):
+        """Returns the converted vertex data of one run of vertex lines."""
+        key = (name, run)
+        if key not in self._runs:
+            _, count, start, end = self.index.runs[name][run]
+            chunk = bytes(memoryview(self._buf)[start:end])
+            self._runs[key] = _parse_coords(chunk, name.encode(), count, self.vertex_dtype)
+        return self._runs[key]
+
+    def _load(self, name):
+        record = self.index.objects[name]
+        parser = _ObjParser(default_name=self.default_name, dtype=self.vertex_dtype, parse_pools=False,
+                            triangulate=self.triangulate, pool_offsets=record['pool_offsets'])
+        for window in _iter_line_windows(self._buf, self.chunk_size, record['start'], record['end']):
+            parser.feed(window)
+        obj = parser.objects[0]
+
+        # Gather the vertex runs covering the indices used by the faces, and shift the indices to match.
+        pools, blocks = {}, obj['f']
+        for col, vertname in enumerate(['v', 'vt', 'vn']):
+            used = [block[col] for block in blocks if block[col] is not None]
+            if not used:
+                continue
+            runs = self.index.runs[vertname]
+            lo = min(int(cols.min()) for cols in used) - 1
+            hi = max(int(cols.max()) for cols in used) - 1
+            first, last = np.searchsorted(runs[:, 0], [lo, hi], side='right') - 1
+            pools[vertname] = np.concatenate([self._run(vertname, run) for run in range(first, last + 1)])
+            base = runs[first, 0]
+            blocks = [block[:col] + (block[col] - base if block[col] is not None else None,) + block[col + 1:]
+                      for block in blocks]
+        obj['f'] = blocks
+
+        geom = _build_object(obj, pools, **self.options)
+        if self.materials is not None:
+            _attach_geom_materials(geom, self.materials)
+        return geom
+
+
+def read_object(fname, name, index=None, **kwargs):
+    """Loads a single object from an .obj file, reading only the parts of the file that it uses.
+
+    Uses the file's index sidecar, building and saving it first if it is missing or out of date (if it can't be
+    saved, the index built is only used for this call).
+    Keyword arguments are passed on to LazyGeoms (vertex_dtype and the options of read_objfile).
+    """
+    fname = _fspath(fname)
+    if index is None:
+        try:
+            index = ObjIndex.load(fname + ObjIndex.suffix)
+        except (IOError, OSError, ValueError):
+            index = None
+        if index is None or not index.is_current(fname):
+            index = ObjIndex.build(fname)
+            try:
+                index.save()
+            except (IOError, OSError):
+                pass  # E.g. a read-only directory: the index just isn't kept for next time.
+    return LazyGeoms(fname, index=index, **kwargs)[name]
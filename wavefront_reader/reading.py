@@ -1,9 +1,17 @@
 # -*- coding: utf-8 -*-
+import mmap
+import multiprocessing
+import os
+import sys
+import threading
 import numpy as np
-from collections import namedtuple, defaultdict
-from six import iteritems
+from collections import defaultdict, OrderedDict
+from six import iteritems, string_types, text_type
+
+from .stats import _timer
 from os import path
 
+
 def parse_mixed_delim_str(line):
     """Turns .obj face index string line into [verts, texcoords, normals] numeric tuples."""
     arrs = [[], [], []]
@@ -15,57 +23,902 @@ def parse_mixed_delim_str(line):
     return [tuple(arr) for arr in arrs]
 
 
-def read_objfile(fname):
-    """Takes .obj filename and returns dict of object properties for each object in file."""
-    verts = defaultdict(list)
-    obj_props = []
-    with open(fname) as f:
-        lines = f.read().splitlines()
+# Line kinds recognized by the bulk parser.  Everything else is handled line-by-line.
+_V, _VT, _VN, _F, _OTHER = range(5)
+_GROUP_PREFIXES = ('usemtl', 'g', 's')
+_KIND_PREFIXES = {_V: 'v', _VT: 'vt', _VN: 'vn', _F: 'f'}
+_POOL_PREFIXES = {_V: b'v', _VT: b'vt', _VN: b'vn'}
+_FACE_DELIMS = bytes(bytearray(ord(' ') if chr(c) in 'f/' else c for c in range(256)))
+
+
+def _classify_lines(buf):
+    """Returns the start offsets, end offsets and prefix kinds of every line in a bytes buffer."""
+    arr = np.frombuffer(buf, dtype=np.uint8)
+    ends = np.flatnonzero(arr == ord('\n'))
+    if len(arr) and arr[-1] != ord('\n'):
+        ends = np.append(ends, len(arr))
+    starts = np.zeros_like(ends)
+    starts[1:] = ends[:-1] + 1
+
+    # Each character is only looked at when the ones before it are a prefix, so it is at most the line's newline;
+    # a last line without one is clipped to its own last character instead, which ends no prefix.
+    last = len(arr) - 1
+    c0 = arr[starts]
+    kinds = np.full(len(starts), _OTHER, dtype=np.int8)
+    is_v, is_f = np.flatnonzero(c0 == ord('v')), np.flatnonzero(c0 == ord('f'))
+    c1 = arr[np.minimum(starts[is_v] + 1, last)]
+    c2 = arr[np.minimum(starts[is_v] + 2, last)]
+    sep1 = (c1 == ord(' ')) | (c1 == ord('\t'))
+    sep2 = (c2 == ord(' ')) | (c2 == ord('\t'))
+    kinds[is_v[sep1]] = _V
+    kinds[is_v[(c1 == ord('t')) & sep2]] = _VT
+    kinds[is_v[(c1 == ord('n')) & sep2]] = _VN
+    c1 = arr[np.minimum(starts[is_f] + 1, last)]
+    kinds[is_f[(c1 == ord(' ')) | (c1 == ord('\t'))]] = _F
+    return starts, ends, kinds
+
+
+def _run_bounds(kinds):
+    """Returns the first line and the last line + 1 of each run of consecutive lines with the same kind."""
+    breaks = np.flatnonzero(kinds[1:] != kinds[:-1]) + 1
+    return np.concatenate(([0], breaks)), np.concatenate((breaks, [len(kinds)]))
+
 
+def _iter_runs(kinds):
+    """Yields (kind, first_line, last_line + 1) for each run of consecutive lines with the same kind."""
+    if not len(kinds):
+        return
+    run_starts, run_ends = _run_bounds(kinds)
+    for first, last in zip(run_starts.tolist(), run_ends.tolist()):
+        yield int(kinds[first]), first, last
+
+
+def _first_line(chunk):
+    """Returns the first line of a block, without copying the rest of it as split() would."""
+    end = chunk.find(b'\n')
+    return chunk[:end] if end >= 0 else chunk
+
+
+def _parse_coords(chunk, prefix, nlines, dtype=np.float64):
+    """Converts a block of same-prefix vertex lines into an (nlines x ncoords) float array in one call."""
+    ncoords = len(_first_line(chunk).split()) - 1
+    values = np.fromstring(chunk.replace(prefix, b' '), dtype=dtype, sep=' ')
+    if values.size != nlines * ncoords:
+        raise ValueError("'{}' lines have an inconsistent number of coordinates.".format(prefix.decode()))
+    return values.reshape(nlines, ncoords)
+
+
+def _face_blocks_from_lines(lines):
+    """Slow path: parses face lines one-by-one, grouping consecutive same-shaped faces into blocks."""
+    blocks, faces, signature = [], [], None
     for line in lines:
-        if line:
-            split_line = line.strip().split(' ', 1)
-            if len(split_line) < 2:
-                continue
+        face = parse_mixed_delim_str(line.decode('utf-8').strip().split(' ', 1)[1])
+        face_sig = (len(face[0]), tuple(bool(col) for col in face))
+        if faces and face_sig != signature:
+            blocks.append(_face_block(faces))
+            faces = []
+        faces.append(face)
+        signature = face_sig
+    if faces:
+        blocks.append(_face_block(faces))
+    return blocks
 
-            prefix, value = split_line[0], split_line[1]
-            if prefix == 'o':
-                obj_props.append({})
-                obj = obj_props[-1]
-                obj['f'] = []
-                obj[prefix] = value
-            # For files without an 'o' statement
-            elif prefix == 'v' and len(obj_props) < 1:
-                obj_props.append({})
-                obj = obj_props[-1]
-                obj['f'] = []
-                obj['o'] = fname
-            if obj_props:
-                if prefix[0] == 'v':
-                    verts[prefix].append([float(val) for val in value.split(' ')])
-                elif prefix == 'f':
-                    obj[prefix].append(parse_mixed_delim_str(value))
-                else:
-                    obj[prefix] = value
-
-
-    # Reindex vertices to be in face index order, then remove face indices.
-    verts = {key: np.array(value) for key, value in iteritems(verts)}
-    for obj in obj_props:
-        obj['f'] = tuple(np.array(verts) if verts[0] else tuple() for verts in zip(*obj['f']))
-        for idx, vertname in enumerate(['v' ,'vt', 'vn']):
-            if vertname in verts:
-                obj[vertname] = verts[vertname][obj['f'][idx].flatten() - 1, :]
+
+def _face_block(faces):
+    """Turns a list of equally-shaped parse_mixed_delim_str() results into a (v, vt, vn) block of index arrays."""
+    return tuple(np.array(col, dtype=np.int64) if col[0] else None for col in zip(*faces))
+
+
+def _face_arities(chunk, nlines):
+    """Counts the vertices of each face line in a block, from the whitespace-separated groups after each 'f'."""
+    arr = np.frombuffer(chunk, dtype=np.uint8)
+    blank = arr <= ord(' ')
+    group_starts = np.flatnonzero(blank[:-1] & ~blank[1:]) + 1
+    line_starts = np.flatnonzero(arr == ord('\n')) + 1
+    bounds = np.concatenate([[0], line_starts[line_starts < len(arr)], [len(arr)]])
+    if len(bounds) != nlines + 1:
+        return None
+    return (np.searchsorted(group_starts, bounds[1:], side='left') -
+            np.searchsorted(group_starts, bounds[:-1], side='right'))
+
+
+def _has_uniform_arity(chunk, nlines, arity):
+    """Checks that every line of a block of nlines face lines has arity vertices, without counting them line by
+    line: the block must have nlines * (arity + 1) whitespace-separated groups, with a line starting at every
+    (arity + 1)-th one."""
+    arr = np.frombuffer(chunk, dtype=np.uint8)
+    blank = arr <= ord(' ')
+    group_starts = np.flatnonzero(blank[:-1] & ~blank[1:]) + 1  # After the first group, which starts the block.
+    if len(group_starts) != nlines * (arity + 1) - 1:
+        return False
+    line_starts = group_starts[arity::arity + 1]
+    return bool((arr[line_starts - 1] == ord('\n')).all())
+
+
+def _fan_corners(arities):
+    """Returns the (ntriangles x 3) positions, among the corners of faces with the given vertex counts listed one
+    after the other, of the triangles fanning out from each face's first corner.  Faces of under 3 vertices are
+    dropped."""
+    arities = np.asarray(arities, dtype=np.int64)
+    n_tris = np.maximum(arities - 2, 0)
+    firsts = np.repeat(np.cumsum(arities) - arities, n_tris)
+    steps = np.arange(n_tris.sum()) - np.repeat(np.cumsum(n_tris) - n_tris, n_tris) + 1
+    return np.stack([firsts, firsts + steps, firsts + steps + 1], axis=1)
+
+
+def _triangulate_block(block, arities=None):
+    """Fan-triangulates a (v, vt, vn) face block, given as (nfaces x arity) arrays or, for faces of mixed arity,
+    as flat corner arrays along with each face's vertex count."""
+    if arities is None:
+        if block[0].shape[1] == 3:
+            return block
+        arities = np.full(len(block[0]), block[0].shape[1])
+    corners = _fan_corners(arities)
+    return tuple(col.ravel()[corners] if col is not None else None for col in block)
+
+
+def _parse_faces(chunk, nlines, triangulate=False):
+    """Converts a block of face lines into [(v, vt, vn)] blocks of (nfaces x arity) index arrays.
+
+    All faces are assumed to share the vertex count and layout of the first one (e.g. '1/2/3' or '1//3'), which is
+    verified by counting groups per line and delimiters; blocks that don't match fall back to parsing each line
+    separately.  With triangulate=True,
+    the faces are fan-triangulated into (ntriangles x 3) arrays, and may have any mix of vertex counts.
+    """
+    groups = _first_line(chunk).split()[1:]
+    arity, nslash = len(groups), groups[0].count(b'/')
+    double = b'//' in groups[0]
+    present = [True, nslash > 0 and not double, nslash == 2]
+    ncols = sum(present)
+    ncorners = nlines * arity
+
+    try:
+        ints = np.fromstring(chunk.translate(_FACE_DELIMS), dtype=np.int64, sep=' ')
+    except ValueError:
+        ints = None
+    # The counts below are totals over the block, so the faces' vertex counts are checked line by line first.
+    uniform = ints is not None and ints.size == ncorners * ncols and _has_uniform_arity(chunk, nlines, arity)
+    arities = None
+    if triangulate and ints is not None and not uniform:
+        arities = _face_arities(chunk, nlines)
+        if arities is not None:
+            ncorners = int(arities.sum())
+    if (ints is None or not (uniform or arities is not None) or ints.size != ncorners * ncols or
+            chunk.count(b'/') != ncorners * nslash or chunk.count(b'//') != (ncorners if double else 0)):
+        blocks = _face_blocks_from_lines(chunk.splitlines())
+        return [_triangulate_block(block) for block in blocks] if triangulate else blocks
+
+    cols = iter(range(ncols))
+    if arities is not None:
+        ints = ints.reshape(ncorners, ncols)
+        return [_triangulate_block(tuple(ints[:, next(cols)] if has else None for has in present), arities)]
+    ints = ints.reshape(nlines, arity, ncols)
+    block = tuple(ints[:, :, next(cols)] if has else None for has in present)
+    return [_triangulate_block(block) if triangulate else block]
+
+
+def _resolve_relative(block, counts):
+    """Turns the negative (relative) indices of a (v, vt, vn) face block into absolute ones, given the number of
+    each kind of vertex listed so far."""
+    return tuple(np.where(col < 0, col + (counts.get(name, 0) + 1), col) if col is not None and col.min() < 0
+                 else col for name, col in zip(['v', 'vt', 'vn'], block))
+
+
+def _merge_face_blocks(blocks):
+    """Concatenates (v, vt, vn) face blocks into one (nfaces x arity) index array per column."""
+    if not blocks:
+        return None, None, None
+    shapes = set((block[0].shape[1], tuple(col is not None for col in block)) for block in blocks)
+    if len(shapes) > 1:
+        raise ValueError("All faces in an object must have the same number of vertices and index types.")
+    if len(blocks) == 1:
+        return blocks[0]
+    return tuple(np.concatenate(cols) if cols[0] is not None else None for cols in zip(*blocks))
+
+
+class _Pool(object):
+    """An (n x ncoords) float array that grows by amortized doubling as blocks of vertex data are appended."""
+
+    def __init__(self):
+        self._data = None
+        self.size = 0
+
+    def append(self, rows):
+        if self._data is None:
+            self._data = np.empty((max(len(rows), 1024), rows.shape[1]), dtype=rows.dtype)
+        elif rows.shape[1] != self._data.shape[1]:
+            raise ValueError("Vertex data lines have an inconsistent number of coordinates.")
+        end = self.size + len(rows)
+        if end > len(self._data):
+            grown = np.empty((max(end, 2 * len(self._data)), self._data.shape[1]), dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:end] = rows
+        self.size = end
+
+    @property
+    def array(self):
+        return self._data[:self.size]
+
+    @property
+    def nbytes(self):
+        """The allocated size, including the room left for growth."""
+        return self._data.nbytes if self._data is not None else 0
+
+
+class _ObjParser(object):
+    """Collects the global vertex pools and per-object face blocks from .obj file data."""
+
+    def __init__(self, default_name, continuation=False, dtype=np.float64, parse_pools=True, on_mtllib=None,
+                 triangulate=False, pool_offsets=None, stats=None):
+        self.default_name = default_name
+        self.stats = stats
+        self.dtype = dtype
+        self.parse_pools = parse_pools
+        self.triangulate = triangulate
+        self.on_mtllib = on_mtllib
+        self.pools = defaultdict(_Pool)
+        # Vertex counts so far, which relative face indices are resolved against.
+        self.counts = dict(pool_offsets or {})
+        self.objects = []
+        self.mtllibs = []
+        self.implicit = None
+        self.continued_verts = False
+        # Face lines of the current object, collected across grouping statements to be converted in one go.
+        self._face_chunks, self._face_lines, self._face_cuts = [], 0, []
+        self._n_faces = 0  # Faces of the current object so far.
+        if continuation:
+            # Data starting mid-file first belongs to an object opened earlier, marked by a None name.
+            self._new_object(None)
+
+    def _new_object(self, name):
+        # '_groups' records each grouping statement with the number of faces before it, for submeshes.
+        obj = {'o': name, 'f': [], '_groups': []}
+        self._n_faces = 0
+        self.objects.append(obj)
+        return obj
+
+    def _current_object(self):
+        # For files without an 'o' statement, vertex data opens an object named after the file.
+        if not self.objects:
+            self.implicit = self._new_object(self.default_name)
+        elif self.objects[-1]['o'] is None:
+            self.continued_verts = True
+        return self.objects[-1]
+
+    def feed(self, buf):
+        """Parses a buffer (bytes, mmap or memoryview) of whole lines, bulk-converting each run of v/vt/vn/f lines."""
+        stats = self.stats
+        with _timer(stats, 'classify'):
+            starts, ends, kinds = _classify_lines(buf)
+            if not len(kinds):
+                return
+            run_starts, run_ends = _run_bounds(kinds)
+            # Plain lists, as indexing numpy arrays one run at a time dominates when runs are short.
+            runs = zip(kinds[run_starts].tolist(), run_starts.tolist(), run_ends.tolist(),
+                       starts[run_starts].tolist(), ends[run_ends - 1].tolist())
+        for kind, first, last, start, end in runs:
+            chunk = bytes(buf[start:end])
+            if stats is not None and kind in _KIND_PREFIXES:
+                stats.record('lines', _KIND_PREFIXES[kind], last - first)
+            if kind in _POOL_PREFIXES:
+                self._flush_faces()  # Relative indices count the vertices listed before each face.
+                self._current_object()
+                prefix = _POOL_PREFIXES[kind]
+                self.counts[prefix.decode()] = self.counts.get(prefix.decode(), 0) + last - first
+                if not self.parse_pools:
+                    continue
+                with _timer(stats, 'coords'):
+                    self.pools[prefix.decode()].append(_parse_coords(chunk, prefix, last - first, self.dtype))
+            elif kind == _F:
+                if self.objects:
+                    self._face_chunks.append(chunk)
+                    self._face_lines += last - first
             else:
-                obj[vertname] = tuple()
-        del obj['f']
+                with _timer(stats, 'other'):
+                    for line in chunk.decode('utf-8', 'replace').split('\n'):
+                        self._parse_line(line)
+        self._flush_faces()
+
+    def _flush_faces(self):
+        """Converts the collected face lines of the current object at once, and records the grouping statements
+        that came between them in '_groups'."""
+        if not self._face_chunks:
+            return
+        chunk, n_lines, cuts = b'\n'.join(self._face_chunks), self._face_lines, self._face_cuts
+        self._face_chunks, self._face_lines, self._face_cuts = [], 0, []
+        with _timer(self.stats, 'faces'):
+            blocks = _parse_faces(chunk, n_lines, self.triangulate)
+            if b'-' in chunk:  # Relative indices, which are rare enough to look for first.
+                blocks = [_resolve_relative(block, self.counts) for block in blocks]
+            obj = self.objects[-1]
+            if cuts:
+                face_cuts = [line for line, _, _ in cuts]
+                if self.triangulate:
+                    n_tris = np.maximum(_face_arities(chunk, n_lines) - 2, 0)
+                    face_cuts = np.concatenate([[0], np.cumsum(n_tris)])[face_cuts].tolist()
+                obj['_groups'].extend((self._n_faces + face_cut, prefix, value)
+                                      for face_cut, (_, prefix, value) in zip(face_cuts, cuts))
+            obj['f'].extend(blocks)
+            self._n_faces += sum(len(block[0]) for block in blocks)
+
+    def _parse_line(self, line):
+        """Handles a single line the bulk classifier doesn't recognize (metadata, comments, odd whitespace)."""
+        split_line = line.strip().split(' ', 1)
+        if len(split_line) < 2:
+            return
+
+        prefix, value = split_line[0], split_line[1]
+        if self.stats is not None:
+            self.stats.record('lines', prefix, 1)
+        if prefix == 'mtllib':
+            # Reported as soon as it is seen, so the material libraries can be loaded while parsing goes on.
+            self.mtllibs.append(value)
+            if self.on_mtllib is not None:
+                self.on_mtllib(value)
+
+        if prefix == 'o':
+            self._flush_faces()
+            self._new_object(value)
+        elif prefix[0] == 'v':
+            self._flush_faces()
+            self._current_object()
+            self.counts[prefix] = self.counts.get(prefix, 0) + 1
+            if self.parse_pools:
+                self.pools[prefix].append(np.array([[float(val) for val in value.split()]],
+                                                   dtype=self.dtype))
+        elif self.objects:
+            obj = self.objects[-1]
+            if prefix == 'f':
+                self._flush_faces()
+                block = _face_block([parse_mixed_delim_str(value)])
+                if '-' in value:
+                    block = _resolve_relative(block, self.counts)
+                obj['f'].append(_triangulate_block(block) if self.triangulate else block)
+                self._n_faces += len(obj['f'][-1][0])
+            else:
+                if prefix in _GROUP_PREFIXES and self._face_lines:
+                    self._face_cuts.append((self._face_lines, prefix, value))
+                elif prefix in _GROUP_PREFIXES:
+                    obj['_groups'].append((self._n_faces, prefix, value))
+                obj[prefix] = value
+
+    def pop_objects(self, final=False):
+        """Removes and returns the objects that are complete, which is all of them once the input has ended."""
+        n_done = len(self.objects) if final else len(self.objects) - 1
+        done, self.objects = self.objects[:n_done], self.objects[n_done:]
+        return done
+
+    def build(self, objects, **options):
+        """Yields each object's property dict, reindexing its vertex data into face order (see _build_object)."""
+        pools = {key: pool.array for key, pool in iteritems(self.pools)}
+        for obj in objects:
+            if obj is self.implicit and not obj['f']:
+                continue  # Shared vertex pools listed before the first 'o' statement.
+            with _timer(self.stats, 'build'):
+                geom = _build_object(obj, pools, **options)
+            if self.stats is not None:
+                self.stats.record_arrays(geom)
+            yield geom
+
+    def record_pools(self):
+        """Records the allocated size of the vertex pools."""
+        if self.stats is not None:
+            for pool in self.pools.values():
+                self.stats.record('allocations', 'pools', pool.nbytes)
+
+
+def _index_dtype(n_verts):
+    """Returns the smallest unsigned integer type that can index n_verts vertices."""
+    return np.uint16 if n_verts <= np.iinfo(np.uint16).max + 1 else np.uint32
+
+
+def _weld_face_columns(face_cols):
+    """Finds the unique (v, vt, vn) index combinations among an object's face corners.
+
+    Returns the zero-based pool indices of each unique combination (None for absent columns), along with
+    the position of every face corner in that unique list.
+    """
+    cols = [col.ravel() - 1 if col is not None else None for col in face_cols]
+    present = [col for col in cols if col is not None]
+    sizes = [int(col.max()) + 1 for col in present]
+    if np.prod(sizes, dtype=object) < np.iinfo(np.int64).max:
+        # Combine the columns into one mixed-radix integer key, which np.unique can sort directly.
+        key = present[0].astype(np.int64)
+        for col, size in zip(present[1:], sizes[1:]):
+            key = key * size + col
+        _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    else:
+        _, first, inverse = np.unique(np.stack(present, axis=1), axis=0, return_index=True, return_inverse=True)
+    return [col[first] if col is not None else None for col in cols], inverse.ravel()
+
+
+def _face_labels(blocks, groups, keys):
+    """Labels an object's faces by the values of the grouping statements (keys) in effect for them.
+
+    Returns each face's label, and the tuple of statement values of each label, in order of first appearance.
+    """
+    state, group_ids = dict.fromkeys(keys), {}
+    bounds, labels = [0], []
+    for pos, prefix, value in list(groups) + [(sum(len(block[0]) for block in blocks), None, None)]:
+        if pos > bounds[-1]:  # The faces since the last statement, labeled by the values then in effect.
+            labels.append(group_ids.setdefault(tuple(state[key] for key in keys), len(group_ids)))
+            bounds.append(pos)
+        if prefix in state:
+            state[prefix] = value
+
+    face_labels = np.repeat(np.array(labels, dtype=np.int64), np.diff(bounds))
+    return face_labels, sorted(group_ids, key=group_ids.get)
+
+
+def _group_faces(blocks, groups, keys):
+    """Sorts an object's faces by the values of the grouping statements (keys) in effect for them.
+
+    Returns the stable face order that makes each group contiguous (None if they already are), and a list of
+    (values, n_faces) per group, in order of first appearance.
+    """
+    face_labels, values = _face_labels(blocks, groups, keys)
+    counts = np.bincount(face_labels, minlength=len(values))
+    order = np.argsort(face_labels, kind='stable') if np.any(np.diff(face_labels) < 0) else None
+    return order, [(value, int(count)) for value, count in zip(values, counts)]
+
+
+def _normalized(vecs):
+    """Scales each row to unit length, leaving all-zero rows (of degenerate faces) as they are."""
+    lengths = np.sqrt((vecs ** 2).sum(axis=-1, keepdims=True))
+    return vecs / np.where(lengths > 0, lengths, 1)
+
+
+def _face_normals(corners):
+    """Returns the normals of (nfaces x arity x 3) face corners, with twice the face area as their length."""
+    corners = corners - corners[:, :1]  # Keeps the cross products accurate far from the origin.
+    # Newell's method: the summed edge cross products are normal to the face, even for non-planar polygons.
+    return np.cross(corners, np.roll(corners, -1, axis=1)).sum(axis=1)
+
 
-    geoms = {obj['o']:obj for obj in obj_props}
+def _mesh_bounds(corners):
+    """Returns the bounds dict of (nfaces x arity x 3) face corners (see read_objfile), without 'n_vertices'."""
+    points = corners.reshape(-1, 3)
+    lo, hi = points.min(axis=0), points.max(axis=0)
+    center = (lo + hi) / 2
+    areas = np.sqrt((_face_normals(corners) ** 2).sum(axis=1)) / 2
+    area = areas.sum()
+    centroid = (areas[:, None] * corners.mean(axis=1)).sum(axis=0) / area if area > 0 else center
+    return {'min': tuple(lo.tolist()), 'max': tuple(hi.tolist()), 'center': tuple(center.tolist()),
+            'radius': float(np.sqrt(((points - center) ** 2).sum(axis=1).max())), 'centroid': tuple(centroid.tolist()),
+            'area': float(area), 'n_faces': len(corners), 'n_triangles': len(corners) * (corners.shape[1] - 2)}
 
+
+def _generate_normals(verts, faces, smoothing, mode):
+    """Computes normals for (nfaces x arity) zero-based vertex index faces.
+
+    With mode 'flat', each face's corners get its own normal.  With 'area' or 'angle', corners of faces in the same
+    smoothing group (smoothing holds each face's group label, or -1 for unsmoothed faces) that share a vertex get
+    the sum of those faces' normals, weighted by face area or by the angle at the corner.
+    Returns the normals and an (nfaces x arity) array of zero-based indices into them.
+    """
+    corners = verts[faces]
+    face_normals = _face_normals(corners)
+    unit_normals = _normalized(face_normals)
+    if mode == 'flat':
+        return unit_normals, np.repeat(np.arange(len(faces))[:, None], faces.shape[1], axis=1)
+
+    smooth = smoothing >= 0
+    if mode == 'area':
+        weights = np.broadcast_to(face_normals[:, None, :], corners.shape)
+    else:
+        edges_next = _normalized(np.roll(corners, -1, axis=1) - corners)
+        edges_prev = _normalized(np.roll(corners, 1, axis=1) - corners)
+        angles = np.arccos(np.clip((edges_next * edges_prev).sum(axis=-1), -1, 1))
+        weights = unit_normals[:, None, :] * angles[:, :, None]
+
+    keys = faces[smooth] * (int(smoothing.max()) + 1) + smoothing[smooth][:, None]
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.ravel()
+    weights = weights[smooth].reshape(-1, 3)
+    sums = np.stack([np.bincount(inverse, weights=weights[:, dim], minlength=len(uniq)) for dim in range(3)], axis=1)
+
+    normal_idx = np.empty(faces.shape, dtype=np.int64)
+    normal_idx[smooth] = inverse.reshape(-1, faces.shape[1])
+    normal_idx[~smooth] = len(uniq) + np.arange(int((~smooth).sum()))[:, None]
+    normals = np.concatenate([_normalized(sums), unit_normals[~smooth]]).astype(verts.dtype, copy=False)
+    return normals, normal_idx
+
+
+def _build_object(obj, pools, indexed=False, index_dtype=None, interleaved=False, submeshes=False, normals=None,
+                  bounds=False):
+    """Turns a parsed object's face blocks into vertex arrays, either expanded per face corner or indexed."""
+    obj = dict(obj)
+    blocks, groups = obj.pop('f'), obj.pop('_groups', ())
+    face_cols = _merge_face_blocks(blocks)
+    if bounds and face_cols[0] is not None and 'v' in pools:
+        obj['bounds'] = _mesh_bounds(pools['v'][:, :3][face_cols[0] - 1])  # Leaves out w or vertex colors.
+    if normals is not None and normals not in ('flat', 'area', 'angle'):
+        raise ValueError("normals must be 'flat', 'area' or 'angle', not {!r}.".format(normals))
+    if normals and face_cols[0] is not None and face_cols[2] is None:
+        # Generated normals become a vertex pool of their own, with an index column like read 'vn' data.
+        smoothing = np.zeros(len(face_cols[0]), dtype=np.int64)
+        if normals != 'flat':
+            smoothing, values = _face_labels(blocks, groups, ('s',))
+            unsmoothed = np.array([str(value).lower() in ('off', '0') for value, in values])
+            smoothing = np.where(unsmoothed[smoothing], -1, smoothing)
+        pools = dict(pools)
+        pools['vn'], normal_idx = _generate_normals(pools['v'][:, :3], face_cols[0] - 1, smoothing, normals)
+        face_cols = (face_cols[0], face_cols[1], normal_idx + 1)
+    if submeshes and face_cols[0] is not None:
+        keys = ('usemtl',) if submeshes is True else tuple(submeshes)
+        order, counts = _group_faces(blocks, groups, keys)
+        if order is not None:
+            face_cols = tuple(col[order] if col is not None else None for col in face_cols)
+        arity, start, obj['submeshes'] = face_cols[0].shape[1], 0, []
+        for values, n_faces in counts:
+            submesh = dict(zip(keys, values))
+            submesh.update(start=start * arity, count=n_faces * arity)
+            obj['submeshes'].append(submesh)
+            start += n_faces
+        obj['submeshes'] = tuple(obj['submeshes'])
+    elif submeshes:
+        obj['submeshes'] = tuple()
+    if indexed:
+        if face_cols[0] is None:
+            face_cols, inverse = (None, None, None), np.zeros(0, dtype=np.int64)
+        else:
+            shape = face_cols[0].shape
+            face_cols, inverse = _weld_face_columns(face_cols)
+            inverse = inverse.reshape(shape)
+        n_verts = len(face_cols[0]) if face_cols[0] is not None else 0
+        obj['indices'] = inverse.astype(index_dtype or _index_dtype(n_verts))
+    else:
+        face_cols = [col.ravel() - 1 if col is not None else None for col in face_cols]
+    if 'bounds' in obj:
+        obj['bounds']['n_vertices'] = len(face_cols[0])
+
+    names = [name for name, col in zip(['v', 'vt', 'vn'], face_cols) if name in pools and col is not None]
+    if interleaved:
+        # Gather every attribute straight into its columns of one array, then expose them as views.
+        widths = [pools[name].shape[1] for name in names]
+        n_rows = len(face_cols[0]) if face_cols[0] is not None else 0
+        dtype = pools[names[0]].dtype if names else np.float64
+        obj['interleaved'] = np.empty((n_rows, sum(widths)), dtype=dtype)
+        col_edges = np.cumsum([0] + widths)
+    for idx, vertname in enumerate(['v', 'vt', 'vn']):
+        if vertname not in names:
+            obj[vertname] = tuple()
+        elif interleaved:
+            col = names.index(vertname)
+            view = obj['interleaved'][:, col_edges[col]:col_edges[col + 1]]
+            view[:] = pools[vertname].take(face_cols[idx], axis=0)
+            obj[vertname] = view
+        else:
+            obj[vertname] = pools[vertname].take(face_cols[idx], axis=0)
+    return obj
+
+
+def _iter_line_blocks(f, chunk_size):
+    """Reads a binary file object in chunks, yielding blocks that end on a line boundary."""
+    remainder = b''
+    while True:
+        block = f.read(chunk_size)
+        if not block:
+            break
+        if isinstance(block, text_type):
+            block = block.encode('utf-8')
+        block = remainder + block
+        cut = block.rfind(b'\n') + 1
+        remainder = block[cut:]
+        if cut:
+            yield block[:cut]
+    if remainder:
+        yield remainder
+
+
+def _rfind_newline(arr, start, stop):
+    """Returns the offset of the last newline in arr[start:stop], or -1, for buffers without an rfind() method."""
+    newlines = np.flatnonzero(arr[start:stop] == ord('\n'))
+    return start + int(newlines[-1]) if len(newlines) else -1
+
+
+def _iter_line_windows(buf, chunk_size, start=0, end=None):
+    """Yields memoryview windows of about chunk_size bytes over buf[start:end] that end on line boundaries."""
+    view = memoryview(buf)
+    arr = np.frombuffer(view, dtype=np.uint8)
+    end = len(arr) if end is None else end
+    while start < end:
+        stop = min(start + chunk_size, end)
+        if stop < end:
+            last = buf.rfind(b'\n', start, stop) if hasattr(buf, 'rfind') else _rfind_newline(arr, start, stop)
+            if last >= 0:
+                stop = last + 1
+            else:  # A line longer than chunk_size: extend the window to its end.
+                rest = arr[stop:end] == ord('\n')
+                stop = stop + int(np.argmax(rest)) + 1 if rest.any() else end
+        yield view[start:stop]
+        start = stop
+
+
+def _mmap_file(fname):
+    """Returns a read-only memory map of a file (or b'' for an empty file, which can't be mapped)."""
+    with open(fname, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _fspath(source):
+    """Returns the str path of a path-like object (e.g. a pathlib.Path), and any other source unchanged."""
+    if hasattr(source, '__fspath__'):
+        source = source.__fspath__()
+        if isinstance(source, bytes):
+            source = source.decode(sys.getfilesystemencoding())
+    return source
+
+
+def _source_blocks(source, chunk_size):
+    """Returns the default object name of an .obj source and an iterator over its line-aligned blocks of data.
+
+    Filenames are memory-mapped and buffers (bytes, bytearray, memoryview, mmap) are used in place, so neither is
+    ever copied or decoded as a whole.  File objects are read chunk_size bytes at a time.
+    """
+    source = _fspath(source)
+    if isinstance(source, bytes) and len(source) < 4096 and b'\n' not in source and path.isfile(source):
+        raise ValueError("Bytes sources are .obj data, not filenames; pass the filename {!r} as a str or "
+                         "path object.".format(source))
+    if isinstance(source, string_types):
+        return source, _iter_line_windows(_mmap_file(source), chunk_size)
+    if hasattr(source, 'read'):
+        return getattr(source, 'name', None), _iter_line_blocks(source, chunk_size)
+    return None, _iter_line_windows(source, chunk_size)
+
+
+def iter_objfile(source, indexed=False, vertex_dtype=np.float64, index_dtype=None, interleaved=False,
+                 submeshes=False, triangulate=False, normals=None, bounds=False, chunk_size=1 << 24,
+                 on_mtllib=None, stats=None):
+    """Takes .obj filename and yields each object's property dict (as in read_objfile) as soon as it ends.
+
+    The source can also be a binary file object or an in-memory buffer (see read_objfile).  It is processed
+    chunk_size bytes at a time, and only the shared vertex pools are kept between objects, so memory use
+    follows the largest object rather than the whole file.  Faces may only refer to vertices listed before
+    the next object starts.  on_mtllib, if given, is called with the value of each 'mtllib' line as it is reached.
+    A Stats object passed as stats collects timings and counts (see Stats).
+    """
+    options = dict(indexed=indexed, index_dtype=index_dtype, interleaved=interleaved, submeshes=submeshes,
+                   normals=normals, bounds=bounds)
+    default_name, blocks = _source_blocks(source, chunk_size)
+    parser = _ObjParser(default_name=default_name, dtype=vertex_dtype, on_mtllib=on_mtllib, triangulate=triangulate,
+                        stats=stats)
+    if stats is not None:
+        blocks = _timed_blocks(blocks, stats)
+    for block in blocks:
+        parser.feed(block)
+        for obj in parser.build(parser.pop_objects(), **options):
+            yield obj
+    for obj in parser.build(parser.pop_objects(final=True), **options):
+        yield obj
+    parser.record_pools()
+
+
+def _timed_blocks(blocks, stats):
+    """Passes blocks on, recording their size and the time taken to read them.  Memory-mapped files are only
+    read when their pages are first touched, which is counted in the 'classify' stage instead."""
+    blocks = iter(blocks)
+    while True:
+        with stats.timer('read'):
+            block = next(blocks, None)
+        if block is None:
+            return
+        stats.record('bytes', 'obj', len(block))
+        yield block
+
+
+def _line_aligned_ranges(fname, n_ranges):
+    """Splits a file into about n_ranges (start, end) byte ranges that each begin at the start of a line."""
+    size = path.getsize(fname)
+    bounds = [0]
+    with open(fname, 'rb') as f:
+        for k in range(1, n_ranges):
+            f.seek(max(size * k // n_ranges, bounds[-1]))
+            f.readline()
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+# Vertex counts that byte ranges after the first start from, as the vertices before them are unknown.  Relative
+# face indices then resolve to negative numbers, which are corrected once the preceding ranges are counted.
+_UNKNOWN_OFFSET = 1 << 40
+
+
+def _parse_byte_range(args):
+    """Process pool worker: parses one line-aligned byte range of an .obj file."""
+    fname, start, end, dtype, triangulate = args
+    pool_offsets = dict.fromkeys(['v', 'vt', 'vn'], -_UNKNOWN_OFFSET) if start > 0 else None
+    parser = _ObjParser(default_name=fname, continuation=start > 0, dtype=dtype, triangulate=triangulate,
+                        pool_offsets=pool_offsets)
+    for block in _iter_line_windows(_mmap_file(fname), 1 << 24, start, end):
+        parser.feed(block)
+    pools = {key: pool.array for key, pool in iteritems(parser.pools)}
+    return pools, parser.objects, parser.implicit is not None, parser.continued_verts, parser.mtllibs
+
+
+def _read_objfile_parallel(fname, workers, vertex_dtype, triangulate, options, on_mtllib=None):
+    """Parses byte ranges of the file in a process pool, then stitches their pools and objects back together."""
+    pool = multiprocessing.Pool(workers)
+    try:
+        results = pool.map(_parse_byte_range, [(fname, start, end, vertex_dtype, triangulate) for start, end in
+                                               _line_aligned_ranges(fname, workers)])
+    finally:
+        pool.close()
+
+    pools = defaultdict(list)
+    objects, implicit, counts = [], None, {}
+    for idx, (range_pools, range_objects, has_implicit, continued_verts, mtllibs) in enumerate(results):
+        if on_mtllib is not None:
+            for value in mtllibs:
+                on_mtllib(value)
+        if idx:
+            # Negative indices left by the worker are 1 - _UNKNOWN_OFFSET - (vertices before the range) too low.
+            offsets = {name: counts.get(name, 0) + _UNKNOWN_OFFSET - 1 for name in ['v', 'vt', 'vn']}
+            for obj in range_objects:
+                obj['f'] = [_resolve_relative(block, offsets) for block in obj['f']]
+        for key, arr in iteritems(range_pools):
+            pools[key].append(arr)
+            counts[key] = counts.get(key, 0) + len(arr)
+        if has_implicit:
+            implicit = range_objects[0]
+        if range_objects and range_objects[0]['o'] is None:
+            # Faces and properties continuing the last object of the previous range.
+            head = range_objects.pop(0)
+            if objects:
+                n_faces = sum(len(block[0]) for block in objects[-1]['f'])
+                objects[-1]['f'].extend(head.pop('f'))
+                objects[-1]['_groups'].extend((pos + n_faces, prefix, value) for pos, prefix, value in
+                                              head.pop('_groups'))
+                objects[-1].update((key, value) for key, value in iteritems(head) if key != 'o')
+            elif continued_verts:
+                head['o'] = fname
+                implicit = head
+                objects.append(head)
+        objects.extend(range_objects)
+
+    pools = {key: np.concatenate(arrs) for key, arrs in iteritems(pools)}
+    return {obj['o']: _build_object(obj, pools, **options) for obj in objects
+            if obj is not implicit or obj['f']}
+
+
+def _read_objfile_sequential(source, vertex_dtype, triangulate, options, on_mtllib=None, stats=None,
+                             chunk_size=1 << 24):
+    """Parses all of the source before building any object, so that faces may refer to vertices listed anywhere
+    in the file (unlike iter_objfile, which builds each object as soon as it ends)."""
+    default_name, blocks = _source_blocks(source, chunk_size)
+    parser = _ObjParser(default_name=default_name, dtype=vertex_dtype, on_mtllib=on_mtllib, triangulate=triangulate,
+                        stats=stats)
+    if stats is not None:
+        blocks = _timed_blocks(blocks, stats)
+    for block in blocks:
+        parser.feed(block)
+    geoms = {obj['o']: obj for obj in parser.build(parser.pop_objects(final=True), **options)}
+    parser.record_pools()
     return geoms
 
 
-def read_mtlfile(fname):
+def read_objfile(fname, indexed=False, vertex_dtype=np.float64, index_dtype=None, interleaved=False,
+                 submeshes=False, triangulate=False, normals=None, bounds=False, workers=1, lazy=False,
+                 on_mtllib=None, stats=None):
+    """Takes .obj filename and returns dict of object properties for each object in file.
+
+    The filename can be a str or a path object (e.g. a pathlib.Path).  Instead of a filename, the .obj data can
+    also be given as a binary file object or as a bytes, bytearray, memoryview or mmap buffer (bytes are always
+    data, never a filename); files are memory-mapped and buffers parsed in place, without being decoded into
+    lines.  Objects of sources without an 'o' statement are named after the file, or None for buffers.  Objects
+    are only built once the whole source is parsed, so faces may refer to vertices listed anywhere in it.
+
+    With indexed=True, each object's 'v', 'vt' and 'vn' arrays hold only its unique vertices, and an
+    'indices' array (uint16 or uint32, one row per face) references them, ready for indexed drawing.
+    vertex_dtype sets the type that coordinates are parsed into, and index_dtype overrides the automatic
+    choice of index type.  With interleaved=True, each object also gets an 'interleaved' array holding the
+    v, vt and vn columns side by side, with 'v', 'vt' and 'vn' returned as views into it.
+    With submeshes=True, each object's faces are sorted so that faces sharing a 'usemtl' material are contiguous,
+    and a 'submeshes' tuple of {'usemtl', 'start', 'count'} dicts gives the range of vertices (or of indices, when
+    indexed) to draw for each material, in order of first use.  submeshes can also be a tuple of the statements to
+    group by, e.g. ('usemtl', 'g', 's').
+    With triangulate=True, faces of any (and mixed) vertex counts are fan-triangulated while they are parsed, so
+    every object's faces are triangles.
+    With normals='flat', 'area' or 'angle', objects whose faces have no normals get generated ones, in the same
+    'vn' layout as read normals: flat face normals, or smooth vertex normals averaged over the faces sharing each
+    vertex, weighted by face area or by corner angle.  Smoothing follows the 's' statements: faces in different
+    smoothing groups don't share normals, and faces after 's off' stay flat.
+    With bounds=True, each object with faces gets a 'bounds' dict, computed from the parsed vertex pools: its
+    axis-aligned box ('min', 'max'), bounding sphere ('center', 'radius'), surface 'area' and area-weighted
+    'centroid', and its 'n_faces', 'n_triangles' (after fan triangulation) and 'n_vertices' (rows of 'v').
+    With workers > 1, the file is split into that many line-aligned byte ranges, parsed in a process pool.
+    With lazy=True, the file is only scanned for where its objects are, and a LazyGeoms mapping is returned
+    that parses each object the first time it is looked up.
+    on_mtllib, if given, is called with the value of each 'mtllib' line found in the file.
+    A Stats object passed as stats collects per-stage timings, bytes read, line counts per prefix and array sizes;
+    the parallel and lazy modes only time their 'parse' or 'scan' stage as a whole.
+    """
+    fname = _fspath(fname)
+    if lazy:
+        from .index import LazyGeoms
+        with _timer(stats, 'scan'):
+            geoms = LazyGeoms(fname, vertex_dtype=vertex_dtype, indexed=indexed, index_dtype=index_dtype,
+                              interleaved=interleaved, submeshes=submeshes, triangulate=triangulate,
+                              normals=normals, bounds=bounds)
+        if on_mtllib is not None:
+            for value in geoms.index.mtllibs:
+                on_mtllib(value)
+        return geoms
+    if workers > 1:
+        if not isinstance(fname, string_types):
+            raise ValueError("Parallel parsing (workers > 1) needs the .obj data as a filename.")
+        options = dict(indexed=indexed, index_dtype=index_dtype, interleaved=interleaved, submeshes=submeshes,
+                       normals=normals, bounds=bounds)
+        with _timer(stats, 'parse'):
+            return _read_objfile_parallel(fname, workers, vertex_dtype, triangulate, options, on_mtllib)
+    options = dict(indexed=indexed, index_dtype=index_dtype, interleaved=interleaved, submeshes=submeshes,
+                   normals=normals, bounds=bounds)
+    return _read_objfile_sequential(fname, vertex_dtype, triangulate, options, on_mtllib, stats)
+
+
+def _parse_mtl_value(data):
+    """Converts an .mtl value to an int, a float, a tuple of floats, or (e.g. for texture maps) a string."""
+    split_data = data.split()
+    if len(split_data) > 1:
+        try:
+            return tuple(float(d) for d in split_data)
+        except ValueError:
+            return data
+    if data.isdigit() or (data[0] == '-' and data[1:].isdigit()):
+        return int(data)
+    try:
+        return float(data)
+    except ValueError:
+        return data
+
+
+def materials_to_array(materials):
+    """Packs a {name: material dict} mapping into a NumPy structured array with one record per material.
+
+    Every property becomes a field: floats (with a shape for tuples), ints, or fixed-width strings.  Properties a
+    material doesn't define are NaN, -1 or ''.
+    """
+    fields = OrderedDict([('name', (text_type, max([len(name) for name in materials] + [1])))])
+    for material in materials.values():
+        for prefix, value in iteritems(material):
+            kind, width = fields.get(prefix, (int, 1))
+            if isinstance(value, string_types):
+                kind, width = text_type, max(width, len(value)) if kind is text_type else len(value)
+            elif kind is not text_type:
+                kind = float if isinstance(value, (float, tuple)) or kind is float else int
+                width = max(width, len(value) if isinstance(value, tuple) else 1)
+            fields[prefix] = kind, width
+
+    dtype, fill = [], {}
+    for prefix, (kind, width) in iteritems(fields):
+        if kind is text_type:
+            dtype.append((prefix, 'U{}'.format(width)))
+        elif kind is int:
+            dtype.append((prefix, np.int64))
+            fill[prefix] = -1
+        else:
+            dtype.append((prefix, np.float64, (width,)) if width > 1 else (prefix, np.float64))
+            fill[prefix] = np.nan
+
+    records = np.zeros(len(materials), dtype=dtype)
+    for prefix, value in iteritems(fill):
+        records[prefix] = value
+    records['name'] = list(materials)
+    for idx, material in enumerate(materials.values()):
+        for prefix, value in iteritems(material):
+            if isinstance(value, tuple) and records[prefix].ndim > 1:
+                records[prefix][idx, :len(value)] = value
+            else:
+                records[prefix][idx] = value
+    return records
+
+
+def read_mtlfile(fname, structured=False):
+    """Returns a {name: material dict} mapping of an .mtl file, or a structured array (see materials_to_array)."""
     materials = {}
     with open(fname) as f:
         lines = f.read().splitlines()
@@ -76,46 +929,146 @@ def read_mtlfile(fname):
             if len(split_line) < 2:
                 continue
 
-            prefix, data = split_line[0], split_line[1]
+            prefix, data = split_line[0], split_line[1].strip()
             if 'newmtl' in prefix:
                 material = {}
                 materials[data] = material
-            elif materials:
-                if data:
-                    split_data = data.strip().split(' ')
-
-                    if len(split_data) > 1:
-                        material[prefix] = tuple(float(d) for d in split_data)
-                    else:
-                        try:
-                            material[prefix] = int(data)
-                        except ValueError:
-                            material[prefix] = float(data)
-
-    return materials
-
-
-def read_wavefront(fname_obj):
-    """Returns mesh dictionary along with their material dictionary from a wavefront (.obj and/or .mtl) file."""
-    fname_mtl = ''
-    geoms = read_objfile(fname_obj)
-    for line in open(fname_obj):
-        if line:
-            split_line = line.strip().split(' ', 1)
-            if len(split_line) < 2:
+            elif materials and data:
+                material[prefix] = _parse_mtl_value(data)
+
+    return materials_to_array(materials) if structured else materials
+
+
+class MaterialCache(object):
+    """A thread-safe, bounded cache of parsed .mtl files, shared by all read_wavefront() calls in the process.
+
+    Entries are keyed on the resolved path and reparsed when the file's mtime or size changes; beyond maxsize
+    files, the least-recently-used entry is dropped.  The cached material dicts are shared, so treat them as
+    read-only.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read_mtlfile(self, fname, structured=False):
+        """Cached version of read_mtlfile()."""
+        key = (path.realpath(fname), structured)
+        stat = os.stat(key[0])
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[0] == (stat.st_mtime, stat.st_size):
+                self._entries[key] = entry
+                return entry[1]
+
+        materials = read_mtlfile(fname, structured=structured)
+        with self._lock:
+            self._entries[key] = (stat.st_mtime, stat.st_size), materials
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return materials
+
+    def invalidate(self, fname=None):
+        """Drops the cached copies of one .mtl file, or of all of them."""
+        with self._lock:
+            if fname is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == path.realpath(fname)]:
+                    del self._entries[key]
+
+
+material_cache = MaterialCache()
+
+
+def _mtllib_paths(dirname, value):
+    """Returns the paths of the material libraries named on an 'mtllib' line, relative to the .obj's directory."""
+    fname = path.join(dirname, value)
+    if path.exists(fname):
+        return [fname]  # A single library whose name contains spaces.
+    return [path.join(dirname, name) for name in value.split()]
+
+
+class _MaterialLoader(object):
+    """Loads material libraries through the shared material_cache, each in a background thread started as soon as
+    the .obj parser reports it."""
+
+    def __init__(self, dirname, stats=None):
+        self.dirname = dirname
+        self.stats = stats
+        self.fnames = []
+        self._threads = []
+        self._results = {}
+
+    def load(self, value):
+        for fname in _mtllib_paths(self.dirname, value):
+            if fname in self.fnames:
                 continue
+            self.fnames.append(fname)
+            thread = threading.Thread(target=self._load, args=(fname,))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
 
-            prefix, data = split_line[0], split_line[1]
-            if 'mtllib' in prefix:
-                fname_mtl = data
-                break
+    def _load(self, fname):
+        try:
+            with _timer(self.stats, 'mtl'):
+                self._results[fname] = material_cache.read_mtlfile(fname)
+            if self.stats is not None:
+                self.stats.record('bytes', 'mtl', path.getsize(fname))
+        except Exception as err:
+            self._results[fname] = err
 
-    if fname_mtl:
-        materials = read_mtlfile(path.join(path.dirname(fname_obj), fname_mtl))
+    def materials(self):
+        """Waits for the loads, and returns the materials of all libraries (later ones winning name clashes)."""
+        with _timer(self.stats, 'mtl_wait'):
+            for thread in self._threads:
+                thread.join()
+        materials = {}
+        for fname in self.fnames:
+            result = self._results[fname]
+            if isinstance(result, Exception):
+                raise result
+            materials.update(result)
+        return materials
 
-        for geom in geoms.values():
-            geom['material'] = materials[geom['usemtl']]
 
-    return geoms
+def _attach_geom_materials(geom, materials):
+    """Adds a geom's 'usemtl' material dict under its 'material' key, and likewise for its submeshes."""
+    geom['material'] = materials[geom['usemtl']]
+    for submesh in geom.get('submeshes', ()):
+        if submesh.get('usemtl') is not None:
+            submesh['material'] = materials[submesh['usemtl']]
+
+
+def _attach_materials(geoms, materials):
+    """Adds each geom's 'usemtl' material dict under its 'material' key."""
+    if hasattr(geoms, 'materials'):  # A LazyGeoms, which adds them when each geom is loaded.
+        geoms.materials = materials
+        return
+    for geom in geoms.values():
+        _attach_geom_materials(geom, materials)
+
+
+def _read_wavefront(fname_obj, stats=None, **kwargs):
+    """Reads an .obj file with its materials in a single pass, returning the geoms and material library paths."""
+    loader = _MaterialLoader(path.dirname(fname_obj), stats)
+    geoms = read_objfile(fname_obj, on_mtllib=loader.load, stats=stats, **kwargs)
+    if loader.fnames:
+        _attach_materials(geoms, loader.materials())
+    return geoms, loader.fnames
+
 
+def read_wavefront(fname_obj, cache=None, **kwargs):
+    """Returns mesh dictionary along with their material dictionary from a wavefront (.obj and/or .mtl) file.
 
+    The .obj file is read once: each material library (all 'mtllib' lines are used) starts loading in the
+    background as soon as the parser reaches it.  Keyword arguments are passed on to read_objfile().  If a
+    WavefrontCache is given, a previously-parsed copy of the file is loaded from it when still valid.
+    A Stats object passed as stats also times the material loading ('mtl'), and the wait for it ('mtl_wait').
+    """
+    fname_obj = _fspath(fname_obj)
+    if cache is not None:
+        return cache.read_wavefront(fname_obj, **kwargs)
+    return _read_wavefront(fname_obj, **kwargs)[0]
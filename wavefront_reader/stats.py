@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+import numpy as np
+from six import iteritems
+
+
+class Stats(object):
+    """Collects timings and counters from read_objfile(), read_wavefront() and WavefrontWriter.dump().
+
+    Pass an instance as their stats argument; without one, nothing is measured.  Afterwards, timings holds the
+    seconds spent per stage (e.g. 'read', 'classify', 'coords', 'faces', 'other', 'build', 'mtl', 'format',
+    'write'), bytes the bytes per source or sink ('obj', 'mtl', 'written'), lines the number of lines per prefix,
+    and allocations the bytes of the arrays made, per kind ('pools', 'v', 'vt', 'vn', 'indices', ...).
+    Each measurement is also passed to callback(kind, name, value), if given, as it is made.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.timings = defaultdict(float)
+        self.bytes = defaultdict(int)
+        self.lines = defaultdict(int)
+        self.allocations = defaultdict(int)
+
+    def record(self, kind, name, value):
+        """Adds value to the named counter of kind 'timings', 'bytes', 'lines' or 'allocations'."""
+        getattr(self, kind)[name] += value
+        if self.callback is not None:
+            self.callback(kind, name, value)
+
+    @contextmanager
+    def timer(self, stage):
+        """Context manager adding the time spent inside it to a stage."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record('timings', stage, time.time() - start)
+
+    def record_arrays(self, geom, names=('v', 'vt', 'vn', 'indices', 'interleaved')):
+        """Records the allocations of a geom's arrays, skipping views into other arrays."""
+        for name in names:
+            arr = geom.get(name)
+            if isinstance(arr, np.ndarray) and arr.base is None:
+                self.record('allocations', name, arr.nbytes)
+
+    def __repr__(self):
+        parts = []
+        for kind in ['timings', 'bytes', 'lines', 'allocations']:
+            values = getattr(self, kind)
+            fmt = '{}={:.4f}' if kind == 'timings' else '{}={}'
+            parts.append('{}: {}'.format(kind, ', '.join(fmt.format(key, value) for key, value in
+                                                         sorted(iteritems(values)))))
+        return 'Stats({})'.format('; '.join(parts))
+
+
+class _NullTimer(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _timer(stats, stage):
+    """Returns stats.timer(stage), or a context manager doing nothing when there is no Stats object."""
+    return _NULL_TIMER if stats is None else stats.timer(stage)
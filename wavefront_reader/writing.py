@@ -1,150 +1,216 @@
+import itertools
 import numpy as np
 
+from .reading import _fan_corners
+
+
 def grouper(n, iterable):
     "grouper(3, 'abcdefg', 'x') --> ('a','b','c'), ('d','e','f'), ('g','x','x')"
     return zip(*[iter(iterable)]*n)
 
 
-def face_index(vertices):
+def _unique_rows(verts):
+    """Returns the distinct rows of a 2D array in order of first appearance, and each row's index into them."""
+    uniq, first, inverse = np.unique(verts, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return uniq[order], rank[inverse.ravel()]
+
+
+def _close_pairs(verts, rtol, atol):
+    """Returns (i, j) index arrays of all vertex pairs with j < i that are np.isclose() in every coordinate.
+
+    Vertices are binned into a grid whose cells are as large as the biggest tolerance, so only the 27 cells around
+    each vertex need to be searched.
+    """
+    cell_size = atol + rtol * np.abs(verts).max()
+    cells = np.floor(verts / cell_size).astype(np.int64)
+    cells -= cells.min(axis=0) - 1  # Leave a margin so neighbouring cell coordinates stay non-negative.
+    spans = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * spans[1] + cells[:, 1]) * spans[2] + cells[:, 2]
+    by_key = np.argsort(keys, kind='stable')
+    sorted_keys = keys[by_key]
+
+    pairs_i, pairs_j = [], []
+    for offset in itertools.product([-1, 0, 1], repeat=3):
+        # Query in key order, which keeps the queries sorted (and searchsorted fast), then map back to vertices.
+        neighbours = sorted_keys + (offset[0] * spans[1] + offset[1]) * spans[2] + offset[2]
+        lo = np.searchsorted(sorted_keys, neighbours, side='left')
+        counts = np.searchsorted(sorted_keys, neighbours, side='right') - lo
+        ii = np.repeat(by_key, counts)
+        jj = by_key[np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - lo, counts)]
+        earlier = jj < ii
+        ii, jj = ii[earlier], jj[earlier]
+        close = np.isclose(verts[ii], verts[jj], rtol=rtol, atol=atol).all(axis=1)
+        pairs_i.append(ii[close])
+        pairs_j.append(jj[close])
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def weld_vertices(verts, rtol=1e-5, atol=1e-8):
+    """Merges vertices that are within np.isclose() tolerance of each other in O(N log N).
+
+    Vertices are kept in order of first appearance, and each vertex is merged into the earliest kept vertex that it
+    is close to, exactly like comparing it against the growing list of kept vertices.
+    Returns the kept Nx3 vertices and an index into them for every input vertex.
+    """
+    verts = np.asarray(verts, dtype=float).reshape(-1, 3)
+    if not len(verts):
+        return verts, np.zeros(0, dtype=np.int64)
+    uniq, inverse = _unique_rows(verts)
+    if not atol + rtol * np.abs(uniq).max():
+        return uniq, inverse
+
+    ii, jj = _close_pairs(uniq, rtol, atol)
+
+    # A vertex is kept if no earlier kept vertex is close to it.  With the pairs sorted by their later vertex,
+    # every earlier vertex is settled by the time a pair reaches it, so one ordered pass resolves the rule.
+    by_later = np.argsort(ii, kind='stable')
+    ii, jj = ii[by_later], jj[by_later]
+    kept = bytearray(b'\x01') * len(uniq)
+    for i, j in zip(ii.tolist(), jj.tolist()):
+        if kept[j]:
+            kept[i] = 0
+    kept = np.frombuffer(kept, dtype=bool)
+
+    target = np.arange(len(uniq))
+    merged = kept[jj] & ~kept[ii]
+    target[~kept] = len(uniq)
+    np.minimum.at(target, ii[merged], jj[merged])
+    new_index = np.cumsum(kept) - 1
+    return uniq[kept], new_index[target][inverse]
+
+
+def face_index(vertices, rtol=1e-5, atol=1e-8):
     """Takes an MxNx3 array and returns a 2D vertices and MxN face_indices arrays"""
-    new_verts = []
-    face_indices = []
-    for wall in vertices:
-        face_wall = []
-        for vert in wall:
-            if new_verts:
-                if not np.isclose(vert, new_verts).all(axis=1).any():
-                    new_verts.append(vert)
-            else:
-                    new_verts.append(vert)
-            face_index = np.where(np.isclose(vert, new_verts).all(axis=1))[0][0]
-            face_wall.append(face_index)
-        face_indices.append(face_wall)
-    return np.array(new_verts), np.array(face_indices)
+    vertices = np.asarray(vertices, dtype=float)
+    new_verts, indices = weld_vertices(vertices.reshape(-1, 3), rtol=rtol, atol=atol)
+    return new_verts, indices.reshape(vertices.shape[:-1])
 
 
 def fan_triangulate(indices):
-    """Return an array of vertices in triangular order using a fan triangulation algorithm."""
-    if len(indices[0]) != 4:
-        raise ValueError("Assumes working with a sequence of quad indices")
-    new_indices = []
-    for face in indices:
-        new_indices.extend([face[:-1], face[1:]])
-    return np.array(new_indices)
-
-    # return np.array([el for (ii, jj) in zip(vertices[1:-1], vertices[2:]) for el in [vertices[0], ii, jj]])
-
-
-class WavefrontWriter(object):
-
-    preamble = "# Blender v2.69 (sub 5) OBJ File: ''\n" + "# www.blender.org\n"
+    """Return an Nx3 array of triangle indices, fanning out from the first vertex of each polygon.
 
-    def __init__(self, string):
-        self._data = self.preamble + string
+    Takes an MxK array of polygon indices, or a sequence of index sequences of mixed lengths.
+    """
+    try:
+        indices = np.asarray(indices)
+    except ValueError:  # Ragged sequences, which recent numpy versions refuse to make object arrays from.
+        indices = np.array(indices, dtype=object)
+    if indices.dtype != object:
+        indices = indices.reshape(len(indices), -1)
+        arities = np.full(len(indices), indices.shape[1])
+    else:
+        arities = np.array([len(face) for face in indices])
+        indices = np.concatenate([np.asarray(face).ravel() for face in indices])
+    return indices.ravel()[_fan_corners(arities)]
 
 
-    @classmethod
-    def from_dicts(cls, mesh_name, vert_dict, normal_dict):
-        """Returns a wavefront .obj string using pre-triangulated vertex dict and normal dict as reference."""
+def _float_fmt(precision):
+    """Returns the printf-style format for a coordinate: shortest round-trip repr, or a fixed number of decimals."""
+    return '%s' if precision is None else '%.{}f'.format(precision)
 
-        # Put header in string
-        wavefront_str = "o {name}\n".format(name=mesh_name)
 
-        # Write Vertex data from vert_dict
-        for wall in vert_dict:
-            for vert in vert_dict[wall]:
-                wavefront_str += "v {0} {1} {2}\n".format(*vert)
+def _format_rows(row_fmt, rows, chunk_rows=65536):
+    """Yields the text of a 2D array formatted with a printf-style template per row, chunk_rows rows at a time."""
+    rows = np.asarray(rows)
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        yield (row_fmt * len(chunk)) % tuple(chunk.ravel().tolist())
 
-        # Write (false) UV Texture data
-        wavefront_str += "vt 1.0 1.0\n"
 
-        # Write Normal data from normal_dict
-        for wall, norm in normal_dict.items():
-            wavefront_str += "vn {0} {1} {2}\n".format(*norm)
+class WavefrontWriter(object):
 
-        # Write Face Indices (1-indexed)
-        vert_idx = 0
-        for wall in vert_dict:
-            for _ in range(0, len(vert_dict[wall]), 3):
-                wavefront_str += 'f '
-                for vert in range(3): # 3 vertices in each face
-                    vert_idx += 1
-                    wavefront_str += "{v}/1/{n} ".format(v=vert_idx, n=wall+1)
-                wavefront_str = wavefront_str[:-1] + '\n'  # Cutoff trailing space and add a newline.
+    preamble = "# Blender v2.69 (sub 5) OBJ File: ''\n" + "# www.blender.org\n"
 
-        # Return Wavefront string
-        return WavefrontWriter(string=wavefront_str)
+    def __init__(self, string='', blocks=()):
+        """Holds a Wavefront file as text, followed by (row_fmt, array) blocks that are only formatted on output."""
+        self._blocks = [self.preamble + string] + list(blocks)
+
+    @staticmethod
+    def _mesh_blocks(name, verts, normals, face_indices, normal_indices, precision):
+        """Returns the blocks for one object with a single (false) texcoord, given 0-indexed face/normal indices."""
+        coord = _float_fmt(precision)
+        face_indices = np.asarray(face_indices).reshape(len(normal_indices), -1)
+        corners = np.empty(face_indices.shape + (2,), dtype=np.int64)
+        corners[..., 0] = face_indices + 1
+        corners[..., 1] = np.asarray(normal_indices).reshape(-1, 1) + 1
+        return ["o {name}\n".format(name=name),
+                ("v {0} {0} {0}\n".format(coord), np.asarray(verts).reshape(-1, 3)),
+                "vt 1.0 1.0\n",  # Write (false) UV Texture data
+                ("vn {0} {0} {0}\n".format(coord), np.asarray(normals).reshape(-1, 3)),
+                ("f" + " %d/1/%d" * face_indices.shape[1] + "\n", corners.reshape(len(corners), -1))]
 
     @classmethod
-    def from_arrays(cls, name, verts, normals, n_verts=3):
-
+    def from_dicts(cls, mesh_name, vert_dict, normal_dict, precision=None):
         """Returns a wavefront .obj string using pre-triangulated vertex dict and normal dict as reference."""
+        verts = np.concatenate([np.reshape(vert_dict[wall], (-1, 3)) for wall in vert_dict])
 
-        # Put header in string
-        wavefront_str = "o {name}\n".format(name=name)
-
-        # Write Vertex data from vert_dict
-        for vert in verts:
-            wavefront_str += "v {0} {1} {2}\n".format(*vert)
-
-        # Write (false) UV Texture data
-        wavefront_str += "vt 1.0 1.0\n"
+        # Each wall's consecutive vertex triplets form faces that use the wall's normal.
+        walls = [wall for wall in vert_dict for _ in range(len(vert_dict[wall]) // 3)]
+        face_indices = np.arange(3 * len(walls))
+        blocks = cls._mesh_blocks(mesh_name, verts, list(normal_dict.values()), face_indices, walls, precision)
+        return cls(blocks=blocks)
 
-        for norm in normals:
-            wavefront_str += "vn {0} {1} {2}\n".format(*norm)
-
-
-        # Write Face Indices (1-indexed)
-        for wall_idx, vert_indices in enumerate(grouper(n_verts, range(1, len(verts) + 1))):
-            face_str = 'f '
-            for idx in vert_indices:
-                face_str += "{v}/1/{n} ".format(v=idx, n=wall_idx + 1)
-            wavefront_str += face_str + '\n'
-
-        return WavefrontWriter(string=wavefront_str)
+    @classmethod
+    def from_arrays(cls, name, verts, normals, n_verts=3, precision=None):
+        """Returns a wavefront .obj string using pre-triangulated vertex dict and normal dict as reference."""
+        n_faces = len(verts) // n_verts
+        face_indices = np.arange(n_faces * n_verts)
+        blocks = cls._mesh_blocks(name, verts, normals, face_indices, np.arange(n_faces), precision)
+        return cls(blocks=blocks)
 
     @classmethod
-    def from_indexed_arrays(cls, name, verts, normals):
+    def from_indexed_arrays(cls, name, verts, normals, precision=None):
         """Takes MxNx3 verts, Mx3 normals to build obj file"""
-
-        # Put header in string
-        wavefront_str = "o {name}\n".format(name=name)
-
-
         new_verts, face_indices = face_index(verts)
         assert new_verts.shape[1] == 3, "verts should be Nx3 array"
         assert face_indices.ndim == 2
 
+        tris_per_face = face_indices.shape[1] - 2
         face_indices = fan_triangulate(face_indices)
-
-        # Write Vertex data from vert_dict
-        for vert in new_verts:
-            wavefront_str += "v {0} {1} {2}\n".format(*vert)
-
-        # Write (false) UV Texture data
-        wavefront_str += "vt 1.0 1.0\n"
-
-        for norm in normals:
-            wavefront_str += "vn {0} {1} {2}\n".format(*norm)
-
-        assert len(face_indices) == len(normals) * 2
-        for norm_idx, vert_idx,  in enumerate(face_indices):
-            wavefront_str += "f"
-            for vv in vert_idx:
-                wavefront_str += " {}/{}/{}".format(vv + 1, 1, (norm_idx // 2) + 1 )
-            wavefront_str += "\n"
-
-        return cls(string=wavefront_str)
-
-    def dump(self, f):
-        """Write Wavefront data to file.  Takes File object or filename."""
-        try:
-            f.write(self._data)
-        except AttributeError:
+        assert len(face_indices) == len(normals) * tris_per_face
+        normal_indices = np.arange(len(face_indices)) // tris_per_face
+        return cls(blocks=cls._mesh_blocks(name, new_verts, normals, face_indices, normal_indices, precision))
+
+    def _iter_text(self, stats=None):
+        for block in self._blocks:
+            if isinstance(block, str):
+                if stats is not None:
+                    for line in block.splitlines():
+                        if line:
+                            stats.record('lines', line.split(' ', 1)[0], 1)
+                yield block
+            else:
+                if stats is not None:
+                    stats.record('lines', block[0].split(' ', 1)[0], len(block[1]))
+                for text in _format_rows(*block):
+                    yield text
+
+    def dump(self, f, stats=None):
+        """Write Wavefront data to file.  Takes File object or filename.
+
+        A Stats object passed as stats collects the time spent formatting ('format') and writing ('write'), the
+        characters written and the lines written per prefix.
+        """
+        if not hasattr(f, 'write'):
             with open(f, 'w') as wf:
-                wf.write(self._data)
-
+                return self.dump(wf, stats)
+        if stats is None:
+            for text in self._iter_text():
+                f.write(text)
+            return
+        texts = self._iter_text(stats)
+        while True:
+            with stats.timer('format'):
+                text = next(texts, None)
+            if text is None:
+                break
+            with stats.timer('write'):
+                f.write(text)
+            stats.record('bytes', 'written', len(text))
 
     def dumps(self):
         """Return Wavefront-formatted data as a string"""
-        return self._data
+        return ''.join(self._iter_text())